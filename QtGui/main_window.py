@@ -0,0 +1,833 @@
+import os
+
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+from PyQt6.QtCore import Qt, QTimer, QElapsedTimer
+from PyQt6.QtGui import QPainter, QPen, QColor, QKeySequence, QShortcut, QPixmap
+from PyQt6.QtWidgets import (
+    QWidget, QMessageBox, QLabel, QFileDialog, QInputDialog
+)
+
+from QtGui.signal_panel import SignalPanel
+from QtGui.simulationUi import Ui_mainForm
+from QtGui.widget_updater import WidgetUpdater
+from simulation.checkpoints import CheckpointRing
+from simulation.engine import (
+    SimulationEngine, TRAIN_LENGTHS,
+)
+from simulation.layout import default_layout
+from simulation.profiling import TickProfiler
+from simulation.runner import SimulationRunner
+from simulation.savestate import save_state, load_state
+from simulation.trace import TraceWriter, TraceReader
+
+
+@lru_cache(maxsize=64)
+def slash_pixmap(rgba: int, thickness: int, left_slash: bool, right_slash: bool, width: int, height: int,
+                 ratio: float) -> QPixmap:
+    """
+    预先绘制斜线，相同参数的斜线控件共用同一张图
+    :param rgba: 线条颜色（QColor.rgba()）
+    :param thickness: 线条粗细
+    :param left_slash: 是否绘制左倾斜线（左上到右下）
+    :param right_slash: 是否绘制右倾斜线（左下到右上）
+    :param width: 控件宽度
+    :param height: 控件高度
+    :param ratio: 设备像素比
+    """
+    pixmap = QPixmap(round(width * ratio), round(height * ratio))
+    pixmap.setDevicePixelRatio(ratio)
+    pixmap.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(pixmap)
+    pen = QPen(QColor.fromRgba(rgba))
+    pen.setWidth(thickness)  # 设置线条粗细
+    painter.setPen(pen)
+    if left_slash:  # 绘制左倾斜线
+        painter.drawLine(0, 0, width, height)
+    if right_slash:  # 绘制右倾斜线
+        painter.drawLine(0, height, width, 0)
+    painter.end()
+    return pixmap
+
+
+class FormDisplay(NamedTuple):
+    """主界面上只取决于区段占用的显示内容（顺序均为 1G -> 8G，信号机为 X1 -> X8）"""
+    occupied: tuple  # 各区段是否占用
+    info_texts: tuple  # info1Label ~ info8Label 的文本
+    flag_texts: tuple  # flag1Label ~ flag8Label 的文本
+    aspects: tuple  # 各信号机收到的低频信号
+
+
+class CustomWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.custom_color = None  # 默认为 None，使用系统默认前景色
+        self.line_thickness = 4  # 默认线条粗细
+        self.draw_left_slash = True  # 默认绘制左倾斜线
+        self.draw_right_slash = True  # 默认绘制右倾斜线
+
+    def set_custom_color(self, color: QColor):
+        """设置自定义颜色，颜色未变化时不重绘"""
+        if color == self.custom_color:
+            return
+        self.custom_color = color
+        self.update()  # 触发重绘
+
+    def set_line_thickness(self, thickness: int):
+        """设置线条粗细，未变化时不重绘"""
+        if thickness == self.line_thickness:
+            return
+        self.line_thickness = thickness
+        self.update()
+
+    def set_slash_direction(self, left_slash: bool, right_slash: bool):
+        """
+        设置斜线方向
+        :param left_slash: 是否绘制左倾斜线（左上到右下）
+        :param right_slash: 是否绘制右倾斜线（左下到右上）
+        """
+        if (left_slash, right_slash) == (self.draw_left_slash, self.draw_right_slash):
+            return
+        self.draw_left_slash = left_slash
+        self.draw_right_slash = right_slash
+        self.update()
+
+    def paintEvent(self, event):
+        # 获取普通画笔颜色（优先使用自定义颜色，否则使用系统前景色）
+        color = self.custom_color or self.palette().color(self.foregroundRole())
+        # 按颜色、粗细、方向和大小取预先绘制的斜线，只需贴图
+        pixmap = slash_pixmap(
+            color.rgba(), self.line_thickness, self.draw_left_slash, self.draw_right_slash,
+            self.width(), self.height(), self.devicePixelRatioF(),
+        )
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()
+
+
+class mainUi(QWidget, Ui_mainForm):
+    RENDER_INTERVAL = 33  # 界面刷新间隔，单位 ms（约 30 帧/秒）
+    FORM_CACHE_SIZE = 256  # 按占用掩码缓存的主界面显示内容数量
+    MAX_SPEED_SLIDER = 11  # 倍速滑块最右一格为最大速度模式
+    SPEED_WINDOW = 0.5  # 最大速度模式下统计实际倍速的时间窗口 (s)
+    REWIND_STEP = 10.0  # Alt+Left 每次回退的仿真时间 (s)
+    TRACE_DIR = "traces"  # 每次运行的记录文件保存目录
+    STATE_DIR = "states"  # 仿真状态文件的默认保存目录
+
+    def __init__(self):
+        super(mainUi, self).__init__()
+        self.setupUi(self)
+
+        # 初始化倍速属性
+        self.simulation_speed = 1.0
+        self.max_speed = False  # 最大速度模式：不按实际时间，尽 CPU 所能推进
+        self.speed_window = [0.0, 0.0]  # 当前统计窗口内推进的仿真时间和经过的实际时间 (s)
+        self.is_paused = False
+
+        # 绑定滑块的值变化信号到槽函数
+        self.accelerateSlider.setMinimum(-10)
+        self.accelerateSlider.setMaximum(self.MAX_SPEED_SLIDER)
+        self.accelerateSlider.setValue(0)  # 设置默认值为 0
+        self.accelerateSlider.valueChanged.connect(self.update_simulation_speed)
+
+        # 仿真引擎，界面只读取其状态
+        self.engine = SimulationEngine(default_layout())
+        # 当前显示的线路，回放时为记录文件中的线路
+        self.track_layout = self.engine.layout
+        # 主界面只有 8 个区段、两列车的显示；回放其它线路时只在线路总览中显示
+        self.form_compatible = True
+        # 主界面上只取决于占用的显示内容，按占用掩码缓存，切换线路时重建
+        self.form_display_cache = lru_cache(maxsize=self.FORM_CACHE_SIZE)(self.build_form_display)
+        # 线路总览，Ctrl+T 打开，第一次打开时才创建
+        self.track_view = None
+        # 工作线程按实际时间推进引擎并发布快照，界面按自己的帧率取最新快照
+        self.runner = SimulationRunner(self.engine)
+        self.clock = self.runner.clock
+        self.rendered_snapshot = None  # 界面上已显示的快照
+        # 界面上已显示的低频信号版本
+        self.rendered_signal_version = None
+        # 控件更新差异层，值未变化的控件不重复设置
+        self.updater = WidgetUpdater()
+        # 分阶段计时，F12 打开/关闭性能面板，Ctrl+Shift+E 导出帧耗时直方图
+        self.profiler = TickProfiler()
+        self.engine.stage_timer = self.profiler.engine_timer  # 工作线程中按阶段计时引擎的每一步
+        self.profile_overlay = None  # 第一次打开时才创建
+        # 每次运行逐步记录到 TRACE_DIR 下的二进制文件
+        self.trace_writer = None
+        # 按仿真时间定期保存的检查点，Alt+Left 回退 REWIND_STEP 秒，Ctrl+B 回退到指定时间
+        self.checkpoints = CheckpointRing()
+        # 回放：Ctrl+O 打开记录文件，回放时不运行仿真
+        self.replay = None  # 正在回放的 TraceReader
+        self.replay_panel = None  # 第一次回放时才创建
+        self.replay_index = 0  # 当前显示的记录下标
+        self.replay_time = 0.0  # 当前回放到的仿真时间 (s)
+        self.replay_speed = 1.0
+        self.replay_timer = QTimer()
+        self.replay_timer.setInterval(self.RENDER_INTERVAL)
+        self.replay_timer.timeout.connect(self.update_replay)
+        QShortcut(QKeySequence("Ctrl+O"), self).activated.connect(self.open_replay)
+        QShortcut(QKeySequence("Ctrl+T"), self).activated.connect(self.show_track_view)
+        QShortcut(QKeySequence("Alt+Left"), self).activated.connect(self.rewind_step)
+        QShortcut(QKeySequence("Ctrl+B"), self).activated.connect(self.rewind_simulation)
+        # Ctrl+S 保存当前仿真状态，Ctrl+L 从状态文件继续仿真
+        QShortcut(QKeySequence("Ctrl+S"), self).activated.connect(self.save_simulation_state)
+        QShortcut(QKeySequence("Ctrl+L"), self).activated.connect(self.load_simulation_state)
+        QShortcut(QKeySequence("F12"), self).activated.connect(self.toggle_profiling)
+        QShortcut(QKeySequence("Ctrl+Shift+E"), self).activated.connect(self.export_profile)
+
+        # 列车长度属性
+        self.train0_length = TRAIN_LENGTHS[0]  # 默认8编组长度，单位为 m
+        self.train1_length = TRAIN_LENGTHS[0]  # 默认8编组长度，单位为 m
+
+        self.train0_nounBox.currentIndexChanged.connect(self.update_train_length)
+        self.train1_nounBox.currentIndexChanged.connect(self.update_train_length)
+
+        # 统一定时器，只决定界面刷新频率，不影响仿真结果
+        self.main_timer = QTimer()
+        self.main_timer.setInterval(self.RENDER_INTERVAL)
+        self.main_timer.timeout.connect(self.update_simulation)
+        # 记录两次刷新之间实际经过的时间
+        self.elapsed_timer = QElapsedTimer()
+
+        # 绑定按钮
+        self.runButton.clicked.connect(self.start_simulation)
+        self.pauseButton.clicked.connect(self.stop_simulation)
+        self.reset_pause_control()
+
+        # 斜线绘制：在界面文件中的占位控件上方覆盖自定义绘制的控件，占位控件保留其中的区段名称
+        self.line_1G = self.create_slash_overlay(self.line_1G)
+        self.line_8G = self.create_slash_overlay(self.line_8G)
+        self.line_4G = self.create_slash_overlay(self.line_4G)
+        self.line_5G = self.create_slash_overlay(self.line_5G)
+
+        self.line_1G.set_line_thickness(4)
+        self.line_8G.set_line_thickness(4)
+        self.line_4G.set_line_thickness(4)
+        self.line_5G.set_line_thickness(4)
+
+        self.line_1G.set_slash_direction(left_slash=False, right_slash=True)
+        self.line_8G.set_slash_direction(left_slash=True, right_slash=False)
+        self.line_4G.set_slash_direction(left_slash=True, right_slash=False)
+        self.line_5G.set_slash_direction(left_slash=False, right_slash=True)
+
+        # 信号机：界面文件中的 LED 按钮只提供位置，由一个控件统一绘制所有灯
+        self.signal_panel = self.create_signal_panel()
+        # 轨道信息和轨道继电器标签，顺序为 1G -> 8G
+        self.info_labels = [getattr(self, f"info{i + 1}Label") for i in range(8)]
+        self.flag_labels = [getattr(self, f"flag{i + 1}Label") for i in range(8)]
+
+    def create_slash_overlay(self, placeholder: QWidget) -> CustomWidget:
+        """
+        创建与占位控件位置、大小相同的斜线控件
+        :param placeholder: 界面文件中的占位控件
+        """
+        overlay = CustomWidget(self)
+        overlay.setGeometry(placeholder.geometry())
+        return overlay
+
+    def create_signal_panel(self) -> SignalPanel:
+        """按界面文件中 X1~X8 信号机 LED 按钮的位置创建信号机绘制控件，并隐藏这些按钮"""
+        panel = SignalPanel(self)
+        for k in range(1, 9):
+            led_1 = getattr(self, f"led_x{k}1")
+            led_2 = getattr(self, f"led_x{k}2")
+            panel.add_head(led_1.geometry(), led_2.geometry())
+            led_1.hide()
+            led_2.hide()
+        panel.raise_()
+        return panel
+
+    def update_simulation_speed(self, value):
+        """更新仿真倍速"""
+        self.max_speed = value >= self.MAX_SPEED_SLIDER
+        self.runner.max_speed = self.max_speed
+        self.speed_window = [0.0, 0.0]
+        if self.max_speed:
+            # 工作线程连续推进，实际倍速取决于 CPU，界面仍按 RENDER_INTERVAL 刷新
+            self.acctimeLabel.setText("倍速: 最大")
+            return
+
+        if value > 0:
+            # 加速模式（从 2x 到 11x）
+            self.simulation_speed = value + 1
+        elif value < 0:
+            # 慢速模式（从 1x 到 0.1x）
+            self.simulation_speed = 1 / abs(value)
+        else:
+            # 正常速度（1x）
+            self.simulation_speed = 1.0
+
+        self.runner.speed = self.simulation_speed
+
+        # 更新倍速显示
+        self.acctimeLabel.setText(f"倍速: {self.simulation_speed:.1f}x")
+
+    def start_simulation(self):
+        """开始仿真，根据输入控件初始化引擎"""
+        # 检查两个轨道选择是否相同
+        if self.train0_trackBox.value() == self.train1_trackBox.value():
+            QMessageBox.warning(
+                self,
+                "轨道选择错误",
+                "列车 0 和列车 1 不能在同一起始轨道上！"
+            )
+            return  # 终止函数
+
+        if self.replay is not None:
+            self.close_replay()
+
+        print("开始仿真")
+
+        # 停止上一次运行的工作线程后才能重新初始化引擎
+        self.close_trace()
+
+        # 初始速度只在这里读取一次，之后由引擎保存
+        self.engine.reset()
+        self.engine.add_train(
+            self.train0_trackBox.value(),
+            float(self.train0_positionEdit.text()),
+            float(self.train0_speedEdit.text()),
+            self.train0_length,
+        )
+        self.engine.add_train(
+            self.train1_trackBox.value(),
+            float(self.train1_positionEdit.text()),
+            float(self.train1_speedEdit.text()),
+            self.train1_length,
+        )
+
+        # 根据滑动条值设置倍速
+        slider_value = self.accelerateSlider.value()
+        self.update_simulation_speed(slider_value)
+        self.begin_run()
+
+    def begin_run(self):
+        """从引擎当前状态开始一次运行：保存第一个检查点，开始记录，启动工作线程和界面刷新定时器"""
+        self.is_paused = False  # 取消暂停状态
+        self.pauseButton.setText('暂停仿真')
+        self.pauseButton.setEnabled(True)
+        self.checkpoints.clear()
+        self.checkpoints.capture(self.engine)
+        self.open_trace()
+
+        self.runner.start()
+        self.rendered_signal_version = None
+        self.rendered_snapshot = None
+        self.elapsed_timer.start()
+        self.main_timer.start()
+
+    def save_simulation_state(self, path=None):
+        """
+        保存当前仿真状态（列车、占用与码、仿真时间、倍速）到状态文件，仿真继续运行
+        :param path: 状态文件路径，为 None 时弹出文件选择框
+        """
+        if self.replay is not None or self.trace_writer is None:
+            return
+        # 工作线程独占引擎，短暂停止后导出，保存的是按下快捷键时的状态
+        self.runner.stop()
+        state = self.engine.export_state()
+        self.runner.start(paused=self.is_paused)
+
+        if not path:
+            os.makedirs(self.STATE_DIR, exist_ok=True)
+            default = os.path.join(self.STATE_DIR, time.strftime("state_%Y%m%d_%H%M%S.zpwstate"))
+            path, _ = QFileDialog.getSaveFileName(self, "保存仿真状态", default, "仿真状态 (*.zpwstate)")
+            if not path:
+                return
+        try:
+            save_state(path, self.engine.layout, state, self.clock.step, self.simulation_speed, self.max_speed)
+        except OSError as e:
+            QMessageBox.warning(self, "无法保存仿真状态", str(e))
+            return
+        print(f"仿真状态: {path}（{state.time:.1f} s）")
+
+    def load_simulation_state(self, path=None):
+        """
+        从状态文件恢复仿真并继续运行，倍速恢复为保存时的设置
+        :param path: 状态文件路径，为 None 时弹出文件选择框
+        """
+        if not path:
+            path, _ = QFileDialog.getOpenFileName(self, "加载仿真状态", self.STATE_DIR, "仿真状态 (*.zpwstate)")
+            if not path:
+                return
+        try:
+            saved = load_state(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "无法加载仿真状态", str(e))
+            return
+        if saved.layout.to_dict() != self.engine.layout.to_dict() or len(saved.state.trains) < 2:
+            # 其它线路的状态文件可在无界面模式下用场景的 state 字段继续运行
+            QMessageBox.warning(self, "无法加载仿真状态", "状态文件的线路或列车数与界面不一致")
+            return
+
+        if self.replay is not None:
+            self.close_replay()
+        self.close_trace()
+        self.engine.restore_state(saved.state)
+        print(f"从仿真状态继续: {path}（{saved.state.time:.1f} s）")
+
+        value = self.speed_slider_value(saved.speed, saved.max_speed)
+        self.accelerateSlider.setValue(value)
+        self.update_simulation_speed(value)
+        self.begin_run()
+
+    def speed_slider_value(self, speed: float, max_speed: bool) -> int:
+        """倍速对应的滑块位置，与 update_simulation_speed 相反"""
+        if max_speed:
+            return self.MAX_SPEED_SLIDER
+        if speed >= 1:
+            return min(int(round(speed)) - 1, self.MAX_SPEED_SLIDER - 1)
+        return max(-int(round(1 / speed)), self.accelerateSlider.minimum())
+
+    def reset_pause_control(self):
+        """没有正在运行的仿真时（启动前、进入回放后、仿真出错后）禁用暂停按钮，开始仿真后恢复"""
+        self.is_paused = False
+        self.pauseButton.setText('暂停仿真')
+        self.pauseButton.setEnabled(False)
+
+    def stop_simulation(self):
+        """暂停或继续仿真"""
+        if not self.is_paused:
+            print(
+                f'暂停仿真（低频信号因占用未变化跳过计算 {self.engine.signal_skipped} 次，'
+                f'控件更新 {self.updater.total_updates} 次，跳过 {self.updater.total_skipped} 次）'
+            )
+            self.pauseButton.setText('继续仿真')
+            self.is_paused = True
+            self.runner.pause()  # 暂停期间的时间不计入仿真
+            self.main_timer.stop()  # 停止定时器
+        elif self.is_paused:
+            print('继续仿真')
+            self.pauseButton.setText('暂停仿真')
+            self.is_paused = False
+            self.runner.resume()
+            self.elapsed_timer.restart()
+            self.main_timer.start()
+
+    def open_trace(self):
+        """开始把之后的每一步写入新的运行记录文件，同时按间隔保存检查点"""
+        os.makedirs(self.TRACE_DIR, exist_ok=True)
+        name = time.strftime("run_%Y%m%d_%H%M%S")
+        trace_path = os.path.join(self.TRACE_DIR, name + ".zpwtrace")
+        suffix = 1
+        while os.path.exists(trace_path):
+            # 同一秒内回退时不覆盖刚写完的记录
+            trace_path = os.path.join(self.TRACE_DIR, f"{name}_{suffix}.zpwtrace")
+            suffix += 1
+        self.trace_writer = TraceWriter(trace_path, self.engine.layout, len(self.engine.trains),
+                                        lengths=self.engine.trains.length)
+        self.clock.on_step = self.record_step
+        print(f"运行记录: {trace_path}")
+
+    def record_step(self, engine):
+        """每推进一步后在工作线程中调用：写运行记录，到达间隔时保存检查点"""
+        self.trace_writer.record(engine)
+        self.checkpoints.capture(engine)
+
+    def rewind_step(self):
+        """回退 REWIND_STEP 秒仿真时间"""
+        self.rewind_simulation(self.REWIND_STEP)
+
+    def rewind_simulation(self, seconds: float = None):
+        """
+        回退仿真：停止工作线程，恢复最近的检查点并重新推进到目标时间后继续运行（暂停时保持暂停）；
+        之后的步写入新的运行记录文件，每个记录文件中的时间保持递增
+        :param seconds: 回退的仿真时间 (s)，为 None 时弹出对话框输入目标时间
+        """
+        if self.replay is not None or self.trace_writer is None or not len(self.checkpoints):
+            return
+        now = self.runner.latest.time
+        earliest = self.checkpoints.earliest_time
+        if seconds is None:
+            target, ok = QInputDialog.getDouble(
+                self, "回退仿真", f"回退到仿真时间 (s)，最早 {earliest:.1f} s：",
+                max(now - self.REWIND_STEP, earliest), earliest, now, 1,
+            )
+            if not ok:
+                return
+        else:
+            target = max(now - seconds, earliest)
+
+        self.close_trace()
+        # 对话框打开期间仍在运行，最早的检查点可能已被丢弃
+        target = max(target, self.checkpoints.earliest_time)
+        reached = self.checkpoints.rewind(self.engine, target)
+        print(f"回退到 {reached:.1f} s")
+        self.open_trace()
+        self.runner.start(paused=self.is_paused)
+
+        # 时间倒退后重新显示，不把负的推进量计入实际倍速
+        snapshot = self.runner.latest
+        self.rendered_signal_version = None
+        self.render(snapshot)
+        self.rendered_snapshot = snapshot
+        self.speed_window = [0.0, 0.0]
+        self.elapsed_timer.restart()
+
+    def close_trace(self):
+        """停止工作线程并结束当前运行记录"""
+        self.runner.stop()
+        if self.trace_writer is not None:
+            self.clock.on_step = None
+            self.trace_writer.close()
+            self.trace_writer = None
+
+    def closeEvent(self, event):
+        """关闭窗口时写完运行记录"""
+        self.main_timer.stop()
+        self.close_trace()
+        self.close_replay()
+        super().closeEvent(event)
+
+    def open_replay(self, path=None):
+        """
+        打开运行记录并进入回放，当前仿真随之结束，退出回放后点击开始仿真重新运行
+        :param path: 记录文件路径，为 None 时弹出文件选择框
+        """
+        if not path:
+            path, _ = QFileDialog.getOpenFileName(self, "打开运行记录", self.TRACE_DIR, "运行记录 (*.zpwtrace)")
+            if not path:
+                return
+        # 先写完当前运行的记录，打开的可能正是这个文件
+        self.main_timer.stop()
+        self.close_trace()
+        self.reset_pause_control()
+        try:
+            reader = TraceReader(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "无法打开运行记录", str(e))
+            return
+        if not len(reader):
+            reader.close()
+            QMessageBox.warning(self, "无法回放", "运行记录为空")
+            return
+
+        self.close_replay()
+        self.replay = reader
+        self.set_track_layout(reader.layout, reader.section_count == 8 and reader.train_count >= 2)
+        if not self.form_compatible:
+            # 主界面显示不了的线路在线路总览中回放
+            self.show_track_view()
+        if self.replay_panel is None:
+            from QtGui.replay_panel import ReplayPanel
+
+            self.replay_panel = ReplayPanel(self)
+            self.replay_panel.playToggled.connect(self.set_replay_playing)
+            self.replay_panel.seekRequested.connect(self.seek_replay)
+            self.replay_panel.speedChanged.connect(self.set_replay_speed)
+            self.replay_panel.closeRequested.connect(self.close_replay)
+        self.replay_panel.set_trace(os.path.basename(path), len(reader), float(reader.records[-1]["time"]))
+        self.replay_panel.show()
+        print(f"回放: {path}（{len(reader)} 步，{reader.duration:.1f} s）")
+        self.seek_replay(0)
+
+    def close_replay(self):
+        """退出回放，恢复仿真线路的显示"""
+        if self.replay is None:
+            return
+        self.replay_timer.stop()
+        self.replay.close()
+        self.replay = None
+        self.set_track_layout(self.engine.layout, True)
+        if self.replay_panel is not None:
+            self.replay_panel.hide()
+
+    def seek_replay(self, index: int):
+        """
+        跳到第 index 条记录；每条记录都是完整状态，直接按偏移读取
+        :param index: 记录下标
+        """
+        if self.replay is None:
+            return
+        self.replay_index = min(max(index, 0), len(self.replay) - 1)
+        snapshot = self.replay.snapshot(self.replay_index)
+        self.replay_time = snapshot.time
+        self.render(snapshot)
+        self.replay_panel.set_position(self.replay_index, snapshot.time)
+
+    def set_replay_playing(self, playing: bool):
+        """开始或暂停回放，到达末尾后重新播放从头开始"""
+        if self.replay is None:
+            return
+        if playing:
+            if self.replay_index >= len(self.replay) - 1:
+                self.seek_replay(0)
+            self.elapsed_timer.start()
+            self.replay_timer.start()
+        else:
+            self.replay_timer.stop()
+
+    def set_replay_speed(self, speed: float):
+        """设置回放倍速"""
+        self.replay_speed = speed
+
+    def update_replay(self):
+        """按实际经过的时间和回放倍速推进回放位置"""
+        elapsed = self.elapsed_timer.restart() / 1000
+        self.replay_time += elapsed * self.replay_speed
+        index = self.replay.index_at_time(self.replay_time)
+        if index != self.replay_index:
+            self.replay_index = index
+            snapshot = self.replay.snapshot(index)
+            self.render(snapshot)
+            self.replay_panel.set_position(index, snapshot.time)
+        if index >= len(self.replay) - 1:
+            self.replay_timer.stop()
+            self.replay_panel.set_playing(False)
+
+    def update_simulation(self):
+        """取工作线程发布的最新快照，有新状态时刷新界面"""
+        if self.runner.error is not None:
+            self.main_timer.stop()
+            QMessageBox.critical(self, "仿真出错", str(self.runner.error))
+            self.close_trace()
+            self.reset_pause_control()
+            return
+        self.profiler.begin_tick()
+        elapsed = self.elapsed_timer.restart() / 1000  # 距上次刷新的实际时间（秒）
+        snapshot = self.runner.latest
+        self.profiler.mark("pickup")
+        sim_advanced = 0.0
+        if snapshot is not self.rendered_snapshot:
+            if self.rendered_snapshot is not None:
+                sim_advanced = snapshot.time - self.rendered_snapshot.time
+            self.render(snapshot)
+            self.rendered_snapshot = snapshot
+        self.profiler.end_tick(self.RENDER_INTERVAL / 1000, sim_advanced, elapsed)
+        if self.max_speed:
+            self.update_achieved_speed(sim_advanced, elapsed)
+
+        # 性能面板每 15 帧（约 0.5 秒）刷新一次
+        if self.profiler.enabled and self.profiler.frames % 15 == 0:
+            self.update_profile_overlay()
+
+    def update_achieved_speed(self, sim_advanced: float, elapsed: float):
+        """
+        最大速度模式下每 SPEED_WINDOW 秒在倍速标签上显示一次实际倍速
+        :param sim_advanced: 本帧推进的仿真时间 (s)
+        :param elapsed: 本帧经过的实际时间 (s)
+        """
+        window = self.speed_window
+        window[0] += sim_advanced
+        window[1] += elapsed
+        if window[1] >= self.SPEED_WINDOW:
+            self.acctimeLabel.setText(f"倍速: 最大（实际 {window[0] / window[1]:.0f}x）")
+            self.speed_window = [0.0, 0.0]
+
+    def toggle_profiling(self):
+        """打开或关闭分阶段计时及性能面板"""
+        enabled = not self.profiler.enabled
+        self.profiler.set_enabled(enabled)
+        if self.profile_overlay is None:
+            self.profile_overlay = QLabel(self)
+            self.profile_overlay.setGeometry(self.width() - 360, 5, 350, 360)
+            self.profile_overlay.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+            self.profile_overlay.setStyleSheet(
+                "QLabel{background-color: rgba(0, 0, 0, 170); color: white; font-family: monospace; padding: 4px;}"
+            )
+            self.profile_overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.profile_overlay.setVisible(enabled)
+        if enabled:
+            self.profile_overlay.raise_()
+            self.profile_overlay.setText("性能统计中...")
+
+    def update_profile_overlay(self):
+        """
+        刷新性能面板：帧耗时分位数、实际/设定倍速、超时和丢弃的仿真时间、控件更新与跳过次数、
+        界面各阶段每帧耗时和引擎各阶段每步耗时
+        """
+        summary = self.profiler.summary()
+        if not summary["frames"]:
+            return
+        lines = [
+            f"帧耗时 p50 {summary['p50_ms']:.2f} ms  p99 {summary['p99_ms']:.2f} ms",
+            f"倍速 实际 {summary['achieved_speed']:.2f}x / 设定 "
+            + ("最大" if self.max_speed else f"{self.simulation_speed:.1f}x"),
+            f"超时帧 {summary['missed_deadlines']} / {summary['frames']}  丢弃 {self.clock.dropped_time:.1f} s",
+            f"控件 上一帧更新 {self.updater.last_frame_updates} 跳过 {self.updater.last_frame_skipped}  "
+            f"累计 {self.updater.total_updates} / {self.updater.total_skipped}",
+        ]
+        for stage, us in summary["stages_us"].items():
+            lines.append(f"  {stage:<30}{us:8.1f} us")
+        if summary["engine_stages_us"]:
+            lines.append("引擎每步（工作线程）")
+            for stage, us in summary["engine_stages_us"].items():
+                lines.append(f"  {stage:<30}{us:8.1f} us")
+        self.profile_overlay.setText("<br>".join(lines).replace(" ", "&nbsp;"))
+
+    def export_profile(self):
+        """导出帧耗时直方图到当前目录"""
+        path = f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        self.profiler.export(path)
+        print(f"帧耗时直方图已导出到 {path}")
+
+    def set_track_layout(self, layout, form_compatible: bool):
+        """
+        切换显示的线路
+        :param layout: TrackLayout
+        :param form_compatible: 主界面能否显示该线路（8 个区段、至少两列车）
+        """
+        self.track_layout = layout
+        self.form_compatible = form_compatible
+        self.form_display_cache = lru_cache(maxsize=self.FORM_CACHE_SIZE)(self.build_form_display)
+        self.rendered_signal_version = None
+        if self.track_view is not None:
+            self.track_view.set_layout(layout)
+
+    def show_track_view(self):
+        """打开线路总览"""
+        if self.track_view is None:
+            from QtGui.track_view import TrackView
+
+            self.track_view = TrackView(self)
+            self.track_view.set_layout(self.track_layout)
+        self.track_view.show()
+        self.track_view.raise_()
+        snapshot = self.replay.snapshot(self.replay_index) if self.replay is not None else self.rendered_snapshot
+        if snapshot is not None:
+            self.track_view.set_snapshot(snapshot)
+
+    def render(self, snapshot):
+        """
+        根据引擎快照刷新所有显示
+        :param snapshot: SimulationEngine.snapshot() 的返回值
+        """
+        if self.track_view is not None and self.track_view.isVisible():
+            self.track_view.set_snapshot(snapshot)
+            self.profiler.mark("track_view")
+        if not self.form_compatible:
+            return
+
+        self.updater.begin_frame()
+
+        # 更新轨道和信号显示，只在占用变化、低频信号重新计算后刷新
+        if snapshot.signal_version != self.rendered_signal_version:
+            display = self.form_display(snapshot)
+            self.profiler.mark("form_display")
+            self.update_train_location(display)
+            self.profiler.mark("update_train_location")
+            self.info_line_label(display)
+            self.profiler.mark("info_line_label")
+            self.railway_signal(display)
+            self.profiler.mark("railway_signal")
+            self.update_flag_status(display)
+            self.profiler.mark("update_flag_status")
+            self.rendered_signal_version = snapshot.signal_version
+
+        # 更新列车标签
+        self.update_train_labels(snapshot)
+        self.profiler.mark("update_train_labels")
+
+        # 更新列车实时速度和限速
+        self.update_current_speed_display(snapshot)
+        self.update_limit_display(snapshot)
+        self.profiler.mark("update_speed_display")
+
+        self.updater.end_frame()
+
+    def update_current_speed_display(self, snapshot):
+        """更新列车当前速度显示"""
+        # 将速度从 m/s 转换为 km/h 并显示在 LCD 上
+        train0, train1 = snapshot.train(0), snapshot.train(1)
+        train0_speed_kmh = train0.speed * 3.6  # m/s 转换为 km/h
+        train1_speed_kmh = train1.speed * 3.6  # m/s 转换为 km/h
+
+        self.updater.set_text(self.train0_nowLabel, f'{train0_speed_kmh:.0f}')
+        self.updater.set_text(self.train1_nowLabel, f'{train1_speed_kmh:.0f}')
+
+    def update_limit_display(self, snapshot):
+        """更新列车限速显示（无限速时即为列车设置的最高时速）"""
+        train0, train1 = snapshot.train(0), snapshot.train(1)
+        self.updater.set_text(self.train0_limitLabel, f'{round(train0.target_speed * 3.6, 0):.0f}')
+        self.updater.set_text(self.train1_limitLabel, f'{round(train1.target_speed * 3.6, 0):.0f}')
+
+    def update_train_labels(self, snapshot):
+        """更新列车标签显示"""
+        train0, train1 = snapshot.train(0), snapshot.train(1)
+        self.updater.set_text(
+            self.train0Label,
+            f"列车 0 <br>- 距离 0{train0.current_track + 1}G: {train0.remaining_distance:.0f} m <br>- 到达时间: {train0.remaining_time:.1f} s"
+        )
+        self.updater.set_text(
+            self.train1Label,
+            f"列车 1 <br>- 距离 0{train1.current_track + 1}G: {train1.remaining_distance:.0f} m <br>- 到达时间: {train1.remaining_time:.1f} s"
+        )
+
+    def update_train_length(self):
+        """根据编组选择更新列车长度，下次开始仿真时生效"""
+        self.train0_length = TRAIN_LENGTHS[self.train0_nounBox.currentIndex()]
+        self.train1_length = TRAIN_LENGTHS[self.train1_nounBox.currentIndex()]
+
+    def form_display(self, snapshot) -> FormDisplay:
+        """
+        取快照对应的主界面显示内容，同一占用掩码只生成一次
+        :param snapshot: 引擎快照
+        """
+        if snapshot.signal_version == 0:
+            # 尚未按占用计算过低频信号（全为 H），不能由掩码推出，也不放入缓存
+            return self.build_form_display(snapshot.occupancy_mask, snapshot.signals)
+        return self.form_display_cache(snapshot.occupancy_mask)
+
+    def build_form_display(self, mask: int, signals=None) -> FormDisplay:
+        """
+        生成主界面上只取决于占用的显示内容
+        :param mask: 占用位掩码，第 i 位对应第 i + 1 个区段
+        :param signals: 各区段低频信号，为 None 时由当前线路按掩码计算
+        """
+        layout = self.track_layout
+        if signals is None:
+            signals = layout.signals_for_mask(mask)
+        occupied = tuple(bool(mask >> i & 1) for i in range(8))
+
+        info_template = "<br>低频：{low_freq_signal} Hz<br>载频：{center_freq} Hz"
+        info_texts = tuple(
+            f"0{i + 1}G:" + info_template.format(low_freq_signal=signals[i], center_freq=layout.carriers[i])
+            for i in range(8)
+        )
+
+        flag_texts = []
+        for i in range(8):
+            # 区段号之后是本区段及前方 3 个区段（超过 8 回到 1）的轨道继电器，↓ 表示占用，↑ 表示空闲，每 2 条换行
+            label_text = [f"{(i + 1):02d}G:<br>"]
+            for j in range(4):
+                label_text.append(f"{j}GJ {'↓' if occupied[(i + j) % 8] else '↑'}")
+                if j == 1:
+                    label_text.append("<br>")
+            flag_texts.append(" ".join(label_text))
+
+        # 第 k 架信号机防护 k-1G 的出口，X1 对应最后一个区段
+        aspects = (signals[7], *signals[:7])
+        return FormDisplay(occupied, info_texts, tuple(flag_texts), aspects)
+
+    def update_train_location(self, display: FormDisplay):
+        """根据区段占用情况将轨道显示为红色"""
+        default_color = self.palette().color(self.foregroundRole())
+        red_color = QColor("red")
+
+        occupied = display.occupied
+        # 斜线区段使用自定义颜色，直线区段使用样式表
+        self.updater.set_custom_color(self.line_1G, red_color if occupied[0] else default_color)
+        self.updater.set_style_sheet(self.line_2G, "color: red;" if occupied[1] else "")
+        self.updater.set_style_sheet(self.line_3G, "color: red;" if occupied[2] else "")
+        self.updater.set_custom_color(self.line_4G, red_color if occupied[3] else default_color)
+        self.updater.set_custom_color(self.line_5G, red_color if occupied[4] else default_color)
+        self.updater.set_style_sheet(self.line_6G, "color: red;" if occupied[5] else "")
+        self.updater.set_style_sheet(self.line_7G, "color: red;" if occupied[6] else "")
+        self.updater.set_custom_color(self.line_8G, red_color if occupied[7] else default_color)
+
+    def update_flag_status(self, display: FormDisplay):
+        """更新每个 flagXLabel 的轨道继电器状态"""
+        for label, text in zip(self.flag_labels, display.flag_texts):
+            self.updater.set_text(label, text)
+
+    def info_line_label(self, display: FormDisplay):
+        """更新轨道信息显示"""
+        for label, text in zip(self.info_labels, display.info_texts):
+            self.updater.set_text(label, text)
+
+    def railway_signal(self, display: FormDisplay):
+        """更新信号机显示"""
+        self.signal_panel.set_aspects(display.aspects)
@@ -0,0 +1,94 @@
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QSlider, QLabel, QDoubleSpinBox
+
+
+class ReplayPanel(QWidget):
+    """
+    回放控制面板：播放/暂停、时间轴拖动和回放倍速。
+    面板只发出信号，回放逻辑由主窗口处理。
+    """
+    playToggled = pyqtSignal(bool)  # True 为播放
+    seekRequested = pyqtSignal(int)  # 用户拖动时间轴到的记录下标
+    speedChanged = pyqtSignal(float)  # 回放倍速
+    closeRequested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle("回放")
+        self.resize(720, 48)
+
+        self.playButton = QPushButton("播放")
+        self.playButton.setCheckable(True)
+        self.playButton.toggled.connect(self._on_play_toggled)
+
+        self.timeline = QSlider(Qt.Orientation.Horizontal)
+        self.timeline.setMinimum(0)
+        self.timeline.valueChanged.connect(self._on_timeline_changed)
+
+        self.timeLabel = QLabel()
+        self.timeLabel.setMinimumWidth(150)
+
+        self.speedBox = QDoubleSpinBox()
+        self.speedBox.setRange(0.1, 1000.0)
+        self.speedBox.setDecimals(1)
+        self.speedBox.setValue(1.0)
+        self.speedBox.setSuffix("x")
+        self.speedBox.valueChanged.connect(self.speedChanged)
+
+        self.closeButton = QPushButton("退出回放")
+        self.closeButton.clicked.connect(self.closeRequested)
+
+        layout = QHBoxLayout(self)
+        layout.addWidget(self.playButton)
+        layout.addWidget(self.timeline, 1)
+        layout.addWidget(self.timeLabel)
+        layout.addWidget(self.speedBox)
+        layout.addWidget(self.closeButton)
+
+        self.end_time = 0.0
+
+    def set_trace(self, title: str, record_count: int, end_time: float):
+        """
+        切换到新的记录
+        :param title: 窗口标题中显示的记录名
+        :param record_count: 记录条数
+        :param end_time: 最后一条记录的仿真时间 (s)
+        """
+        self.setWindowTitle(f"回放 - {title}")
+        self.end_time = end_time
+        self.timeline.blockSignals(True)
+        self.timeline.setMaximum(max(record_count - 1, 0))
+        self.timeline.setPageStep(max(record_count // 100, 1))
+        self.timeline.setValue(0)
+        self.timeline.blockSignals(False)
+        self.set_playing(False)
+
+    def set_position(self, index: int, time: float):
+        """
+        回放推进时更新时间轴和时间显示，不发出 seekRequested
+        :param index: 当前记录下标
+        :param time: 当前仿真时间 (s)
+        """
+        self.timeline.blockSignals(True)
+        self.timeline.setValue(index)
+        self.timeline.blockSignals(False)
+        self.timeLabel.setText(f"{time:.1f} / {self.end_time:.1f} s")
+
+    def set_playing(self, playing: bool):
+        """更新播放按钮状态，不发出 playToggled"""
+        self.playButton.blockSignals(True)
+        self.playButton.setChecked(playing)
+        self.playButton.setText("暂停" if playing else "播放")
+        self.playButton.blockSignals(False)
+
+    def _on_play_toggled(self, playing: bool):
+        self.playButton.setText("暂停" if playing else "播放")
+        self.playToggled.emit(playing)
+
+    def _on_timeline_changed(self, index: int):
+        self.seekRequested.emit(index)
+
+    def closeEvent(self, event):
+        """关闭面板窗口即退出回放"""
+        self.closeRequested.emit()
+        super().closeEvent(event)
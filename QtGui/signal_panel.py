@@ -0,0 +1,76 @@
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QPainter, QColor
+from PyQt6.QtWidgets import QWidget
+
+from simulation.codes import LOW_FREQ_L, LOW_FREQ_LU, LOW_FREQ_U, LOW_FREQ_H
+
+# 各低频信号下信号机两个灯的颜色
+SIGNAL_COLORS = {
+    LOW_FREQ_L: ("green", "gray"),  # L
+    LOW_FREQ_LU: ("green", "yellow"),  # LU
+    LOW_FREQ_U: ("gray", "yellow"),  # U
+    LOW_FREQ_H: ("red", "gray"),  # H
+}
+# 未定义的信号显示为两个灯都熄灭
+OFF_COLORS = ("gray", "gray")
+
+
+class SignalPanel(QWidget):
+    """
+    所有信号机灯位的统一绘制层：覆盖在主界面上方，不接收鼠标事件。
+    显示变化时只把变化的灯位加入重绘区域，一次 paintEvent 画完，不使用样式表。
+    """
+    LAMP_RADIUS = 10  # 灯的圆角半径，与原按钮样式表的 border-radius 一致
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setGeometry(parent.rect())
+        self.heads = []  # 每架信号机两个灯的位置 (QRect, QRect)
+        self.colors = []  # 每架信号机两个灯当前的颜色 (QColor, QColor)
+        self._color_cache = {}
+
+    def add_head(self, lamp_1: QRect, lamp_2: QRect):
+        """
+        添加一架信号机
+        :param lamp_1: 第一个灯的位置（父控件坐标）
+        :param lamp_2: 第二个灯的位置
+        :return: 信号机编号
+        """
+        self.heads.append((lamp_1, lamp_2))
+        self.colors.append(self._colors(OFF_COLORS))
+        return len(self.heads) - 1
+
+    def _colors(self, names) -> tuple:
+        """颜色名转换为 QColor，同一名称只创建一次"""
+        colors = []
+        for name in names:
+            color = self._color_cache.get(name)
+            if color is None:
+                color = self._color_cache[name] = QColor(name)
+            colors.append(color)
+        return tuple(colors)
+
+    def set_aspects(self, signals):
+        """
+        按低频信号设置各信号机的显示，只重绘变化的信号机
+        :param signals: 各信号机收到的低频信号 (Hz)，顺序与 add_head 一致
+        """
+        for index, signal in enumerate(signals):
+            colors = self._colors(SIGNAL_COLORS.get(float(signal), OFF_COLORS))
+            if colors != self.colors[index]:
+                self.colors[index] = colors
+                lamp_1, lamp_2 = self.heads[index]
+                self.update(lamp_1.united(lamp_2))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        region = event.region()
+        for (lamp_1, lamp_2), (color_1, color_2) in zip(self.heads, self.colors):
+            for lamp, color in ((lamp_1, color_1), (lamp_2, color_2)):
+                if region.intersects(lamp):
+                    painter.setBrush(color)
+                    painter.drawRoundedRect(lamp, self.LAMP_RADIUS, self.LAMP_RADIUS)
+        painter.end()
@@ -0,0 +1,275 @@
+import numpy as np
+from PyQt6.QtCore import Qt, QRectF, QLineF, QPointF
+from PyQt6.QtGui import QPainter, QColor, QPen
+from PyQt6.QtWidgets import QWidget
+
+from simulation.codes import LOW_FREQ_L, LOW_FREQ_LU, LOW_FREQ_U, LOW_FREQ_H
+from simulation.layout import DIRECTIONS
+
+# 低频信号按升序编号（L、LU、U、H），编号越大越严格
+CODE_VALUES = np.array([LOW_FREQ_L, LOW_FREQ_LU, LOW_FREQ_U, LOW_FREQ_H])
+# 各码在码带上的颜色，顺序与 CODE_VALUES 一致
+CODE_COLORS = (QColor("green"), QColor("yellowgreen"), QColor("yellow"), QColor("red"))
+
+
+class TrackView(QWidget):
+    """
+    按线路布置绘制的可缩放线路总览：区段画在一条水平线上，上方为列车，下方为各区段的码带。
+
+    只绘制视口内的区段（按区段起点二分查找）；区段在屏幕上窄于 LOD_SECTION_PX 时
+    按像素列合并，每列取占用与最严格的码，相邻相同的列合并为一个矩形，
+    绘制次数只与窗口宽度有关，与区段数量无关。
+    滚轮缩放，左键拖动平移，双击或按 0 恢复全线视图。
+    """
+    LOD_SECTION_PX = 4  # 区段窄于该像素数时按像素列合并绘制
+    LABEL_SECTION_PX = 60  # 区段宽于该像素数时显示区段名称
+    DETAIL_SECTION_PX = 140  # 区段宽于该像素数时显示低频和载频
+    MARGIN = 20  # 全线视图两侧留白 (px)
+    MAX_SCALE = 2.0  # 最大缩放 (px/m)
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.setWindowTitle("线路总览")
+        self.resize(1200, 240)
+
+        self.track_layout = None
+        self.snapshot = None
+        self.scale = 1.0  # 每米对应的像素数
+        self.offset = 0.0  # 视口左边缘对应的线路位置 (m)
+        self._drag_x = None
+        self._drag_offset = 0.0
+        # 列车在线路上占据的区间 (m) 及其列车编号，每个快照计算一次
+        self._train_lo = np.zeros(0)
+        self._train_hi = np.zeros(0)
+        self._train_index = np.zeros(0, dtype=np.int64)
+
+    def set_layout(self, layout):
+        """
+        切换线路并显示全线
+        :param layout: TrackLayout
+        """
+        self.track_layout = layout
+        self.snapshot = None
+        self._train_lo = self._train_hi = np.zeros(0)
+        self._train_index = np.zeros(0, dtype=np.int64)
+        self.fit()
+
+    def set_snapshot(self, snapshot):
+        """
+        显示新的引擎快照
+        :param snapshot: EngineSnapshot，区段数须与当前线路一致
+        """
+        self.snapshot = snapshot
+        self._train_lo, self._train_hi, self._train_index = self._train_extents(snapshot)
+        self.update()
+
+    def fit(self):
+        """缩放到显示全线"""
+        if self.track_layout is None:
+            return
+        self.scale = max(self.width() - 2 * self.MARGIN, 1) / self.track_layout.total_length
+        self.offset = -self.MARGIN / self.scale
+        self.update()
+
+    def _train_extents(self, snapshot):
+        """
+        计算各列车在线路上占据的区间 [lo, hi] (m)，已驶出线路的列车为 nan
+        :return: lo、hi 和各区间的列车编号；前 len(trains) 个区间依次对应各列车头部所在的部分，
+                 环线上跨过线路起点的列车在之后追加尾部绕到线路另一端的部分
+        """
+        layout = self.track_layout
+        t = snapshot.trains
+        on_line = t.current_track > 0
+        track = np.where(on_line, t.current_track, 1)
+        start = layout.section_starts[track - 1]
+        if DIRECTIONS[layout.direction] > 0:
+            head = start + layout.lengths[track - 1] - t.remaining_distance
+            tail = head - t.length
+        else:
+            head = start + t.remaining_distance
+            tail = head + t.length
+        lo = np.where(on_line, np.minimum(head, tail), np.nan)
+        hi = np.where(on_line, np.maximum(head, tail), np.nan)
+        index = np.arange(len(t))
+        if not layout.loop:
+            return lo, hi, index
+        # 环线上尾部跨过线路起点（或终点）的列车分成两段，超出的部分画在线路另一端
+        total = layout.total_length
+        with np.errstate(invalid="ignore"):
+            before, after = lo < 0, hi > total
+        wrapped_lo = np.concatenate((lo[before] + total, np.zeros(after.sum())))
+        wrapped_hi = np.concatenate((np.full(before.sum(), total), hi[after] - total))
+        wrapped_index = np.concatenate((index[before], index[after]))
+        lo, hi = np.where(before, 0.0, lo), np.where(after, total, hi)
+        return (np.concatenate((lo, wrapped_lo)), np.concatenate((hi, wrapped_hi)),
+                np.concatenate((index, wrapped_index)))
+
+    def _x(self, position):
+        """线路位置 (m) 转换为屏幕横坐标"""
+        return (position - self.offset) * self.scale
+
+    def wheelEvent(self, event):
+        """以光标所在位置为中心缩放"""
+        if self.track_layout is None:
+            return
+        x = event.position().x()
+        anchor = self.offset + x / self.scale
+        fit_scale = max(self.width() - 2 * self.MARGIN, 1) / self.track_layout.total_length
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        self.scale = min(max(self.scale * factor, fit_scale / 2), self.MAX_SCALE)
+        self.offset = anchor - x / self.scale
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_x = event.position().x()
+            self._drag_offset = self.offset
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is not None:
+            self.offset = self._drag_offset - (event.position().x() - self._drag_x) / self.scale
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_0:
+            self.fit()
+        else:
+            super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().color(self.backgroundRole()))
+        if self.track_layout is not None:
+            self._paint_line(painter)
+        painter.end()
+
+    def _paint_line(self, painter: QPainter):
+        layout = self.track_layout
+        width = self.width()
+        y = self.height() / 2
+        foreground = self.palette().color(self.foregroundRole())
+
+        # 视口内的区段范围 [first, last]
+        view_lo = self.offset
+        view_hi = self.offset + width / self.scale
+        starts = layout.section_starts
+        first = max(int(np.searchsorted(starts, view_lo, side="right")) - 1, 0)
+        last = min(int(np.searchsorted(starts, view_hi, side="right")) - 1, layout.section_count - 1)
+        if view_hi < 0 or view_lo > layout.total_length:
+            return
+
+        if self.snapshot is not None:
+            occupied = self.snapshot.occupied
+            codes = np.searchsorted(CODE_VALUES, self.snapshot.signals)
+        else:
+            occupied = np.zeros(layout.section_count, dtype=bool)
+            codes = np.zeros(layout.section_count, dtype=np.int64)
+
+        min_section_px = layout.lengths[first:last + 1].min() * self.scale
+        if min_section_px < self.LOD_SECTION_PX:
+            left, right, occ, code = self._column_runs(first, last, occupied, codes, width)
+        else:
+            left = self._x(starts[first:last + 1])
+            right = self._x(starts[first:last + 1] + layout.lengths[first:last + 1])
+            occ, code = occupied[first:last + 1], codes[first:last + 1]
+
+        # 先画整段空闲轨道和 L 码，再按颜色分批画占用区段和其它码，每种颜色一次调用
+        line_left = self._x(max(view_lo, 0.0))
+        line_right = self._x(min(view_hi, layout.total_length))
+        painter.fillRect(QRectF(line_left, y - 2, line_right - line_left, 4), foreground)
+        painter.fillRect(QRectF(line_left, y + 8, line_right - line_left, 6), CODE_COLORS[0])
+        self._fill_rects(painter, QColor("red"), left[occ], right[occ], y - 2, 4)
+        for index in range(1, len(CODE_COLORS)):
+            mask = code == index
+            self._fill_rects(painter, CODE_COLORS[index], left[mask], right[mask], y + 8, 6)
+
+        if min_section_px >= self.LOD_SECTION_PX:
+            self._paint_details(painter, first, last, y, foreground, min_section_px)
+        self._paint_trains(painter, view_lo, view_hi, y)
+
+    def _column_runs(self, first: int, last: int, occupied, codes, width: int):
+        """
+        按像素列合并区段：每列取占用与最严格的码，再把相邻相同的列合并
+        :return: 各段的左端 x、右端 x、是否占用、码下标（数组）
+        """
+        layout = self.track_layout
+        columns = self.offset + np.arange(width) / self.scale
+        index = np.clip(np.searchsorted(layout.section_starts, columns, side="right") - 1, first, last)
+        # 每列覆盖从 index[k] 到 index[k+1] 之前的区段，reduceat 对相同下标取该区段本身
+        offsets = index - first
+        col_occupied = np.maximum.reduceat(occupied[first:last + 1].astype(np.int8), offsets)
+        col_codes = np.maximum.reduceat(codes[first:last + 1], offsets)
+
+        # 去掉线路两端以外的列
+        inside = (columns >= 0) & (columns < layout.total_length)
+        key = np.where(inside, col_occupied * 8 + col_codes, -1)
+        change = np.flatnonzero(np.diff(key)) + 1
+        bounds = np.concatenate(([0], change, [width]))
+        start, end = bounds[:-1], bounds[1:]
+        keep = key[start] >= 0
+        start, end = start[keep], end[keep]
+        return start.astype(np.float64), end.astype(np.float64), col_occupied[start] > 0, col_codes[start]
+
+    @staticmethod
+    def _fill_rects(painter: QPainter, color: QColor, left, right, top: float, height: float):
+        """用同一种颜色一次画出多个矩形"""
+        if not len(left):
+            return
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(color)
+        painter.drawRects([QRectF(a, top, b - a, height) for a, b in zip(left.tolist(), right.tolist())])
+
+    def _paint_details(self, painter: QPainter, first: int, last: int, y: float, foreground: QColor,
+                       min_section_px: float):
+        """区段足够宽时绘制绝缘节、区段名称和频率"""
+        layout = self.track_layout
+        starts = layout.section_starts[first:last + 1]
+        joints = self._x(np.concatenate((starts, [starts[-1] + layout.lengths[last]])))
+        painter.setPen(QPen(foreground, 2))
+        painter.drawLines([QLineF(x, y - 6, x, y + 6) for x in joints])
+
+        if min_section_px < self.LABEL_SECTION_PX:
+            return
+        detail = min_section_px >= self.DETAIL_SECTION_PX
+        signals = self.snapshot.signals if self.snapshot is not None else None
+        for i in range(first, last + 1):
+            left, right = joints[i - first], joints[i - first + 1]
+            lines = [layout.names[i]]
+            if detail:
+                if signals is not None:
+                    lines.append(f"低频 {signals[i]} Hz")
+                lines.append(f"载频 {layout.carriers[i]} Hz")
+            painter.drawText(QRectF(left, y + 18, right - left, 60),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop, "\n".join(lines))
+
+    def _paint_trains(self, painter: QPainter, view_lo: float, view_hi: float, y: float):
+        """绘制视口内的列车，在屏幕上至少 2 像素宽"""
+        if not len(self._train_lo):
+            return
+        with np.errstate(invalid="ignore"):
+            visible = np.flatnonzero((self._train_hi >= view_lo) & (self._train_lo <= view_hi))
+        if not len(visible):
+            return
+        left = self._x(self._train_lo[visible])
+        right = np.maximum(self._x(self._train_hi[visible]), left + 2.0)
+        self._fill_rects(painter, QColor("royalblue"), left, right, y - 16, 8)
+        if len(visible) * 40 < self.width():
+            # 只在头部所在的部分标注列车编号
+            painter.setPen(self.palette().color(self.foregroundRole()))
+            heads = visible < len(self.snapshot.trains)
+            for index, a in zip(self._train_index[visible[heads]], left[heads]):
+                painter.drawText(QPointF(a, y - 20), f"列车 {index}")
+
+    def resizeEvent(self, event):
+        # 全线视图下调整窗口大小后仍显示全线
+        if self.track_layout is not None and event.oldSize().width() > 0:
+            old_fit = max(event.oldSize().width() - 2 * self.MARGIN, 1) / self.track_layout.total_length
+            if abs(self.scale - old_fit) < 1e-12:
+                self.fit()
+        super().resizeEvent(event)
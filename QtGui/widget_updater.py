@@ -0,0 +1,66 @@
+class WidgetUpdater:
+    """
+    控件更新的差异层：记录每个控件最近一次设置的文本、样式和颜色，
+    只有值真正变化时才调用控件的设置方法，避免每帧重复 setStyleSheet 引起的样式重算。
+    """
+
+    def __init__(self):
+        self._applied = {}  # (控件, 设置方法名) -> 最近一次设置的值
+        self.frame_updates = 0  # 当前帧实际更新的控件次数
+        self.frame_skipped = 0  # 当前帧因值未变化而跳过的次数
+        self.last_frame_updates = 0  # 上一帧实际更新的控件次数，显示在性能面板上
+        self.last_frame_skipped = 0  # 上一帧跳过的次数
+        self.total_updates = 0  # 累计实际更新次数
+        self.total_skipped = 0  # 累计因值未变化而跳过的次数
+
+    def begin_frame(self):
+        """开始新的一帧，重新统计更新次数"""
+        self.frame_updates = 0
+        self.frame_skipped = 0
+
+    def end_frame(self):
+        """结束当前帧，保存本帧的更新和跳过次数"""
+        self.last_frame_updates = self.frame_updates
+        self.last_frame_skipped = self.frame_skipped
+
+    def invalidate(self, widget=None):
+        """
+        丢弃记录的值，下次设置时强制更新
+        :param widget: 只丢弃该控件的记录，为 None 时丢弃全部
+        """
+        if widget is None:
+            self._applied.clear()
+        else:
+            for key in [key for key in self._applied if key[0] is widget]:
+                del self._applied[key]
+
+    def apply(self, widget, setter: str, value) -> bool:
+        """
+        值与上次不同时调用 widget.setter(value)
+        :param widget: 目标控件
+        :param setter: 设置方法名，如 "setText"
+        :param value: 要设置的值
+        :return: 是否实际调用了设置方法
+        """
+        key = (widget, setter)
+        if key in self._applied and self._applied[key] == value:
+            self.frame_skipped += 1
+            self.total_skipped += 1
+            return False
+        getattr(widget, setter)(value)
+        self._applied[key] = value
+        self.frame_updates += 1
+        self.total_updates += 1
+        return True
+
+    def set_text(self, widget, text: str) -> bool:
+        """设置控件文本"""
+        return self.apply(widget, "setText", text)
+
+    def set_style_sheet(self, widget, style: str) -> bool:
+        """设置控件样式表"""
+        return self.apply(widget, "setStyleSheet", style)
+
+    def set_custom_color(self, widget, color) -> bool:
+        """设置 CustomWidget 的线条颜色"""
+        return self.apply(widget, "set_custom_color", color)
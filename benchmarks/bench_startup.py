@@ -0,0 +1,121 @@
+"""
+界面启动时间基准测试。
+
+每次测量都在新的 Python 进程中进行，分别记录：导入界面模块、创建 QApplication、
+构建主窗口、显示到第一次绘制完成的耗时，以及无界面模式导入场景模块的耗时（毫秒）。
+结果取多次测量的中位数，可以设置目标值，超过时返回非零退出码。
+
+用法（在项目根目录下）：
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py --runs 5 --out startup.json
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py --target 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各阶段名称，按启动顺序排列
+GUI_STAGES = ("import", "application", "construct", "first_paint")
+
+
+def measure_gui() -> dict:
+    """在当前进程中测量一次界面启动，各阶段耗时 (ms)"""
+    clock = time.perf_counter
+    t0 = clock()
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication
+    from QtGui.main_window import mainUi
+    t1 = clock()
+    app = QApplication(sys.argv[:1])
+    t2 = clock()
+    window = mainUi()
+    t3 = clock()
+
+    class PaintWatcher(QObject):
+        painted = False
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                self.painted = True
+            return False
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    while not watcher.painted:
+        app.processEvents()
+    t4 = clock()
+    window.close()
+    return {
+        "import": (t1 - t0) * 1e3,
+        "application": (t2 - t1) * 1e3,
+        "construct": (t3 - t2) * 1e3,
+        "first_paint": (t4 - t3) * 1e3,
+        "total": (t4 - t0) * 1e3,
+    }
+
+
+def measure_headless() -> dict:
+    """在当前进程中测量一次无界面模式的导入耗时 (ms)"""
+    t0 = time.perf_counter()
+    import simulation.scenario  # noqa: F401
+    return {"import": (time.perf_counter() - t0) * 1e3, "pyqt_loaded": "PyQt6" in sys.modules}
+
+
+def _run_child(mode: str) -> dict:
+    """在新进程中测量一次，避免已导入的模块影响结果"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    # Qt 可能向标准输出打印提示，结果在最后一行
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="界面启动时间基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="测量次数，结果取中位数")
+    parser.add_argument("--target", type=float, default=None, help="界面启动总耗时目标 (ms)，超过时返回 1")
+    parser.add_argument("--out", default=None, help="结果 JSON 文件")
+    parser.add_argument("--child", choices=("gui", "headless"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        result = measure_gui() if args.child == "gui" else measure_headless()
+        print(json.dumps(result))
+        return 0
+
+    gui_runs = [_run_child("gui") for _ in range(args.runs)]
+    headless_runs = [_run_child("headless") for _ in range(args.runs)]
+    results = {
+        "runs": args.runs,
+        "gui_ms": {stage: statistics.median(r[stage] for r in gui_runs) for stage in GUI_STAGES + ("total",)},
+        "headless_import_ms": statistics.median(r["import"] for r in headless_runs),
+        "headless_loads_pyqt": any(r["pyqt_loaded"] for r in headless_runs),
+    }
+
+    for stage in GUI_STAGES:
+        print(f"  {stage:<12}{results['gui_ms'][stage]:8.1f} ms")
+    print(f"界面启动合计 {results['gui_ms']['total']:.1f} ms（{args.runs} 次中位数）")
+    print(f"无界面模式导入 {results['headless_import_ms']:.1f} ms"
+          + ("，但导入了 PyQt6" if results["headless_loads_pyqt"] else ""))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.target is not None and results["gui_ms"]["total"] > args.target:
+        print(f"超过目标 {args.target:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+仿真步及其各阶段的基准测试。
+
+分别测量无界面引擎（按列车数和区段数扩展）与界面刷新路径的每秒步数和各阶段耗时（微秒），
+结果保存为 JSON，可与上一版本的结果比较以发现性能回退。
+
+用法（在项目根目录下）：
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_tick.py --out bench.json
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_tick.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# 没有显示服务器时使用 offscreen 平台，必须在导入 PyQt6 之前设置
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from simulation.engine import SimulationEngine, FIXED_STEP
+from simulation.layout import TrackLayout
+
+# 无界面路径的扩展规模：(列车数, 区段数)
+HEADLESS_SIZES = ((2, 8), (10, 64), (100, 512), (500, 4096))
+
+# 默认的性能回退阈值（耗时增加的比例）
+REGRESSION_THRESHOLD = 0.3
+
+
+def _time_stages(stages, ticks):
+    """
+    依次执行各阶段 ticks 次，返回总耗时和各阶段平均耗时（微秒）
+    :param stages: [(阶段名, 可调用对象), ...]，按一步内的执行顺序排列
+    """
+    totals = {name: 0.0 for name, _ in stages}
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(ticks):
+        for name, fn in stages:
+            t0 = clock()
+            fn()
+            totals[name] += clock() - t0
+    elapsed = clock() - start
+    return elapsed, {name: total / ticks * 1e6 for name, total in totals.items()}
+
+
+def _make_engine(trains, sections):
+    engine = SimulationEngine(TrackLayout([1500] * sections))
+    # 列车均匀分布，每列之间相隔若干区段
+    spacing = max(1, sections // trains)
+    for i in range(trains):
+        engine.add_train(i * spacing + 1, 500, 300, 209)
+    return engine
+
+
+def bench_headless(trains, sections, ticks):
+    """测量无界面引擎一步内各阶段的耗时"""
+    engine = _make_engine(trains, sections)
+    engine.step()  # 预热并清除首步标志
+    dt = FIXED_STEP
+
+    def advance_time():
+        engine.time += dt
+
+    stages = [
+        ("move_trains", lambda: engine.move_trains(dt)),
+        ("update_tail_positions", engine.update_tail_positions),
+        ("update_occupancy", engine.update_occupancy),
+        ("update_signals", engine.update_signals),
+        ("speed_control", lambda: engine.speed_control(dt)),
+        ("advance_time", advance_time),
+    ]
+    elapsed, stage_us = _time_stages(stages, ticks)
+
+    # 单独测量低频信号的完整计算（update_signals 在占用不变时会跳过，按占用掩码缓存时只查一次表）
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        engine.layout.low_frequency_signals(engine.occupied)
+    stage_us["zpw_low_frequency_signal"] = (time.perf_counter() - t0) / ticks * 1e6
+
+    # 不插入计时的完整步
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        engine.step(dt)
+    step_elapsed = time.perf_counter() - t0
+
+    return {
+        "trains": trains,
+        "sections": sections,
+        "ticks": ticks,
+        "ticks_per_second": ticks / step_elapsed,
+        "staged_ticks_per_second": ticks / elapsed,
+        "stages_us": stage_us,
+    }
+
+
+def bench_gui(ticks):
+    """测量界面路径：引擎一步加上一次完整的界面刷新"""
+    from PyQt6.QtWidgets import QApplication
+    from QtGui.main_window import mainUi
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as trace_dir:
+        window = mainUi()
+        window.TRACE_DIR = trace_dir  # 运行记录写到临时目录，不弄脏工作目录
+        window.show()
+        window.start_simulation()
+        try:
+            return _bench_window(app, window, ticks)
+        finally:
+            window.close()  # 删除临时目录前先写完并关闭运行记录
+
+
+def _bench_window(app, window, ticks):
+    """对已开始仿真的窗口逐阶段计时，见 bench_gui"""
+    window.main_timer.stop()  # 由基准测试自己驱动
+    window.runner.stop()
+    engine = window.engine
+    state = {}
+
+    def step():
+        engine.step(FIXED_STEP)
+        state["snapshot"] = engine.snapshot()
+
+    def render_stage(fn):
+        return lambda: fn(state["snapshot"])
+
+    def display_stage(fn):
+        return lambda: fn(state["display"])
+
+    def form_display():
+        state["display"] = window.form_display(state["snapshot"])
+
+    def force_signal_refresh():
+        # 界面只在信号版本变化时刷新轨道和信号显示，这里强制每步都走一遍以测得最坏情况
+        window.rendered_signal_version = None
+        window.updater.invalidate()
+
+    stages = [
+        ("engine_step", step),
+        ("force_refresh", force_signal_refresh),
+        ("form_display", form_display),
+        ("update_train_location", display_stage(window.update_train_location)),
+        ("info_line_label", display_stage(window.info_line_label)),
+        ("railway_signal", display_stage(window.railway_signal)),
+        ("update_flag_status", display_stage(window.update_flag_status)),
+        ("update_train_labels", render_stage(window.update_train_labels)),
+        ("update_current_speed_display", render_stage(window.update_current_speed_display)),
+        ("update_limit_display", render_stage(window.update_limit_display)),
+        ("process_events", app.processEvents),
+    ]
+    elapsed, stage_us = _time_stages(stages, ticks)
+
+    # 实际运行路径：差异层与信号版本判断生效时的一步
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        engine.step(FIXED_STEP)
+        window.render(engine.snapshot())
+        app.processEvents()
+    render_elapsed = time.perf_counter() - t0
+
+    return {
+        "trains": len(engine.trains),
+        "sections": engine.track_count,
+        "ticks": ticks,
+        "ticks_per_second": ticks / render_elapsed,
+        "worst_case_ticks_per_second": ticks / elapsed,
+        "stages_us": stage_us,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    与基准结果比较，打印耗时增加超过阈值的阶段
+    :param threshold: 耗时增加超过该比例视为回退
+    :return: 回退项数量
+    """
+    def index(results):
+        return {(r["trains"], r["sections"]): r for r in results}
+
+    regressions = 0
+    for path in ("headless", "gui"):
+        old = index(baseline.get(path, []))
+        for result in current.get(path, []):
+            key = (result["trains"], result["sections"])
+            if key not in old:
+                continue
+            for stage, us in result["stages_us"].items():
+                before = old[key]["stages_us"].get(stage)
+                if before and us > before * (1 + threshold):
+                    regressions += 1
+                    print(f"回退: {path} {key} {stage}: {before:.1f} us -> {us:.1f} us")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="仿真步基准测试")
+    parser.add_argument("--ticks", type=int, default=2000, help="每项测量的步数")
+    parser.add_argument("--out", default=None, help="结果 JSON 文件")
+    parser.add_argument("--compare", default=None, help="与之比较的上一版本结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="回退阈值（耗时增加比例）")
+    parser.add_argument("--no-gui", action="store_true", help="只测量无界面路径")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "headless": [],
+        "gui": [],
+    }
+    for trains, sections in HEADLESS_SIZES:
+        result = bench_headless(trains, sections, args.ticks)
+        results["headless"].append(result)
+        print(f"headless {trains:4d} 列 / {sections:5d} 区段: {result['ticks_per_second']:10.0f} 步/秒")
+    if not args.no_gui:
+        result = bench_gui(args.ticks)
+        results["gui"].append(result)
+        print(f"gui      {result['trains']:4d} 列 / {result['sections']:5d} 区段: "
+              f"{result['ticks_per_second']:10.0f} 步/秒（最坏情况 {result['worst_case_ticks_per_second']:.0f}）")
+
+    for path in ("headless", "gui"):
+        for result in results[path]:
+            stages = ", ".join(f"{k} {v:.1f}" for k, v in result["stages_us"].items())
+            print(f"  {path} {result['trains']}/{result['sections']} (us): {stages}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"共 {regressions} 项回退" if regressions else "没有发现回退")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
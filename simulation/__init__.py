@@ -0,0 +1,13 @@
+"""
+ZPW-2000 仿真核心（无界面）。
+
+本包不依赖 PyQt6，可在没有显示服务器的批处理任务和 CI 中直接运行。
+"""
+from simulation.engine import SimulationEngine, EngineSnapshot, EngineState, TrainSnapshot
+from simulation.layout import TrackLayout, load_layout, default_layout
+from simulation.trains import TrainTable
+
+__all__ = [
+    "SimulationEngine", "EngineSnapshot", "EngineState", "TrainSnapshot", "TrainTable",
+    "TrackLayout", "load_layout", "default_layout",
+]
@@ -0,0 +1,157 @@
+"""
+线路通过能力与最小追踪间隔分析。
+
+在线路入口按固定间隔连续发车，用事件驱动快进（SimulationEngine.fast_forward）
+运行到最后一列车尾部驶出线路；只要有列车头部收到非 L 码即视为该间隔不可行。
+对间隔做二分查找，得到每种编组的最小追踪间隔和每小时通过列数。
+
+可行的间隔下各列车始终匀速运行、相对位置不变，在等长区段组成的长直线段上情形按区段长度周期重复，
+因此每次试验前把这样的线段缩短到两端各保留列车群所及的范围（见 compress_layout），结果不变；
+二分查找的范围由闭塞分区长度确定：前车尾部与后车头部之间不足 3 个最短区段时后车必然收到限制性码。
+
+用法：
+    python -m simulation.capacity [--layout layouts/long_line.json] [--speed 300] [--out capacity.json]
+"""
+import argparse
+import json
+import math
+
+import numpy as np
+
+from simulation.codes import LOW_FREQ_L, CODE_SEQUENCE
+from simulation.engine import SimulationEngine, TRAIN_LENGTHS, FIXED_STEP
+from simulation.layout import TrackLayout, load_layout, default_layout
+
+
+def is_restricted(engine: SimulationEngine) -> bool:
+    """线路上是否有列车头部收到非 L 码"""
+    on_line = engine.trains.current_track > 0
+    return bool(np.any(engine.head_signals()[on_line] != LOW_FREQ_L))
+
+
+def compress_layout(layout: TrackLayout, span: float) -> TrackLayout:
+    """
+    缩短由等长区段组成的长直线段，每段两端各保留超过 span 的区段
+    :param layout: 非环线线路
+    :param span: 需要保留的长度 (m)：从最后一列车尾部到第一列车头部的距离，加上码向后传播的区段
+    :return: 新线路；没有可缩短的线段时返回原线路
+    """
+    lengths = layout.lengths
+    count = layout.section_count
+    change = np.flatnonzero(np.diff(lengths)) + 1
+    keep = np.ones(count, dtype=bool)
+    for start, end in zip(np.concatenate(([0], change)), np.concatenate((change, [count]))):
+        margin = math.ceil(span / lengths[start]) + 1
+        if end - start > 2 * margin:
+            keep[start + margin:end - margin] = False
+    if keep.all():
+        return layout
+    index = np.flatnonzero(keep)
+    return TrackLayout(lengths[index], layout.carriers[index], [layout.names[i] for i in index],
+                       layout.direction, loop=False, name=layout.name)
+
+
+def headway_is_clear(layout: TrackLayout, speed_kmh: float, length: float, headway_ticks: int,
+                     train_count: int = 3, dt: float = FIXED_STEP) -> bool:
+    """
+    按给定间隔连续发车，检查是否没有任何列车收到限制性码
+    :param layout: 非环线线路
+    :param speed_kmh: 发车速度 (km/h)
+    :param length: 列车长度 (m)
+    :param headway_ticks: 发车间隔（步数）
+    :param train_count: 发车列数
+    :param dt: 时间步长 (s)
+    :return: 全程无限制性码时为 True
+    """
+    speed = speed_kmh / 3.6
+    # 列车群的长度加上码向后传播的区段，超过它的等长线段上情形只是周期重复
+    span = (train_count - 1) * headway_ticks * dt * speed + length + len(CODE_SEQUENCE) * layout.lengths.max()
+    layout = compress_layout(layout, span)
+    engine = SimulationEngine(layout)
+    entry = layout.entry_track
+    engine.add_train(entry, 0, speed_kmh, length)
+    for k in range(1, train_count):
+        if not engine.fast_forward(k * headway_ticks * dt, dt, on_step=is_restricted):
+            return False
+        engine.add_train(entry, 0, speed_kmh, length)
+
+    # 不受限制时列车匀速运行，最后一列车尾部驶出线路所需时间可以直接算出
+    travel_ticks = math.ceil((layout.total_length + length) / speed / dt) + 1
+    until = ((train_count - 1) * headway_ticks + travel_ticks) * dt
+    return engine.fast_forward(until, dt, on_step=is_restricted)
+
+
+def minimum_headway(layout: TrackLayout, speed_kmh: float, length: float, train_count: int = 3,
+                    dt: float = FIXED_STEP) -> float:
+    """
+    二分查找最小追踪间隔
+    :param layout: 线路，环线会按非环线处理
+    :param speed_kmh: 发车速度 (km/h)
+    :param length: 列车长度 (m)
+    :param train_count: 每次试验的发车列数
+    :param dt: 时间步长 (s)
+    :return: 最小追踪间隔 (s)，精度为一个时间步长
+    """
+    layout = layout.as_open_line()
+    speed = speed_kmh / 3.6
+    # 初始上界：前车尾部至少越过后方 5 个最长区段
+    hi = math.ceil((5 * layout.lengths.max() + length) / speed / dt)
+    # 上界不可行时加倍，超过全线运行时间后必然只有一列车在线
+    limit = math.ceil((layout.total_length + length) / speed / dt) + 1
+    while hi < limit and not headway_is_clear(layout, speed_kmh, length, hi, train_count, dt):
+        hi *= 2
+    hi = min(hi, limit)
+
+    # 发车时前车尾部与后车头部相距不足 3 个最短区段，后车头部所在区段收到 H、U 或 LU 码，必然冲突
+    restricted_sections = len(CODE_SEQUENCE) - 1
+    lo = max(math.ceil((restricted_sections * layout.lengths.min() + length) / speed / dt) - 1, 0)
+    lo = min(lo, hi - 1)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if headway_is_clear(layout, speed_kmh, length, mid, train_count, dt):
+            hi = mid
+        else:
+            lo = mid
+    return hi * dt
+
+
+def analyze_capacity(layout: TrackLayout, speed_kmh: float = 300, lengths=TRAIN_LENGTHS,
+                     train_count: int = 3, dt: float = FIXED_STEP) -> list:
+    """
+    计算各编组长度下的最小追踪间隔和每小时通过列数
+    :return: [{"length", "min_headway", "trains_per_hour"}, ...]
+    """
+    results = []
+    for length in lengths:
+        headway = minimum_headway(layout, speed_kmh, length, train_count, dt)
+        results.append({
+            "length": float(length),
+            "min_headway": headway,
+            "trains_per_hour": 3600 / headway,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZPW-2000 线路通过能力分析")
+    parser.add_argument("--layout", default=None, help="线路 JSON 文件，默认为界面使用的 8 段线路")
+    parser.add_argument("--speed", type=float, default=300, help="发车速度 (km/h)")
+    parser.add_argument("--lengths", type=float, nargs="+", default=list(TRAIN_LENGTHS), help="列车长度 (m)")
+    parser.add_argument("--trains", type=int, default=3, help="每次试验的发车列数")
+    parser.add_argument("--out", default=None, help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    layout = load_layout(args.layout) if args.layout else default_layout()
+    results = analyze_capacity(layout, args.speed, args.lengths, args.trains)
+
+    print(f"线路: {layout.name or args.layout}，{layout.section_count} 个区段，速度 {args.speed:.0f} km/h")
+    for row in results:
+        print(f"  列车长度 {row['length']:.0f} m: 最小追踪间隔 {row['min_headway']:.1f} s，"
+              f"{row['trains_per_hour']:.1f} 列/小时")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"speed": args.speed, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+检查点环：按固定的仿真时间间隔保存引擎状态（SimulationEngine.export_state），
+回退时恢复不晚于目标时间的最近检查点，再用固定步长逐步推进到目标时间。
+
+逐步推进是确定的，回退后的状态与当初运行到该时刻的状态完全相同。
+检查点数量有上限，超过时丢弃最早的，长时间运行内存占用不变；
+能回退到的最早时间为最早检查点的时间。
+"""
+from collections import deque
+
+from simulation.engine import SimulationEngine, EngineState, FIXED_STEP
+
+CHECKPOINT_INTERVAL = 10.0  # 默认检查点间隔（仿真时间，s）
+CHECKPOINT_CAPACITY = 360  # 默认保存的检查点数量，与默认间隔合计 1 小时仿真时间
+
+
+class CheckpointRing:
+    def __init__(self, interval: float = CHECKPOINT_INTERVAL, capacity: int = CHECKPOINT_CAPACITY):
+        """
+        :param interval: 检查点间隔（仿真时间，s）
+        :param capacity: 最多保存的检查点数量
+        """
+        if interval <= 0:
+            raise ValueError("检查点间隔必须大于 0")
+        self.interval = interval
+        self.checkpoints = deque(maxlen=capacity)  # EngineState，按时间升序
+        self._next_time = 0.0  # 下一个检查点的时间
+
+    def __len__(self):
+        return len(self.checkpoints)
+
+    def clear(self):
+        """清空所有检查点，下一次 capture 立即保存"""
+        self.checkpoints.clear()
+        self._next_time = 0.0
+
+    @property
+    def earliest_time(self) -> float:
+        """能回退到的最早仿真时间 (s)，没有检查点时为 None"""
+        return self.checkpoints[0].time if self.checkpoints else None
+
+    def capture(self, engine: SimulationEngine) -> bool:
+        """
+        仿真时间到达下一个检查点时保存引擎状态，每步之后调用（可作为 on_step 的一部分）
+        :return: 是否保存了检查点
+        """
+        if engine.time < self._next_time:
+            return False
+        self.checkpoints.append(engine.export_state())
+        self._next_time = engine.time + self.interval
+        return True
+
+    def nearest(self, time: float) -> EngineState:
+        """
+        不晚于 time 的最近检查点
+        :param time: 仿真时间 (s)
+        """
+        for state in reversed(self.checkpoints):
+            if state.time <= time:
+                return state
+        raise ValueError(f"没有不晚于 {time:.1f} s 的检查点")
+
+    def rewind(self, engine: SimulationEngine, time: float, dt: float = FIXED_STEP) -> float:
+        """
+        把引擎回退到 time：恢复最近的检查点并逐步推进，晚于该检查点的检查点随之丢弃，
+        推进过程中重新保存
+        :param engine: 引擎，须处于停止推进的状态（例如在 SimulationRunner.submit 中调用）
+        :param time: 目标仿真时间 (s)，不早于 earliest_time、不晚于当前时间
+        :param dt: 时间步长 (s)，与原来运行时一致才能得到相同的结果
+        :return: 回退后的仿真时间 (s)，按步长取整
+        """
+        if time > engine.time:
+            raise ValueError(f"目标时间 {time:.1f} s 晚于当前时间 {engine.time:.1f} s")
+        # 留出半个步长的余量，与 SimulationEngine.run 一致
+        state = self.nearest(time + dt * 0.5)
+        while self.checkpoints[-1] is not state:
+            self.checkpoints.pop()
+        engine.restore_state(state)
+        self._next_time = state.time + self.interval
+        ticks = int(round((time - state.time) / dt))
+        for _ in range(ticks):
+            engine.step(dt)
+            self.capture(engine)
+        return engine.time
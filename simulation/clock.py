@@ -0,0 +1,64 @@
+"""
+固定步长仿真时钟。
+
+界面按自己的帧率把实际经过的时间交给时钟，时钟累计后按固定步长推进引擎，
+因此在任何倍速和定时器抖动下，同样的仿真时间都得到同样的结果。
+"""
+from simulation.engine import FIXED_STEP
+
+
+class FixedStepClock:
+    def __init__(self, engine, step: float = FIXED_STEP, max_steps_per_advance: int = 200, on_step=None):
+        """
+        :param engine: 被推进的 SimulationEngine
+        :param step: 固定物理步长 (s)
+        :param max_steps_per_advance: 单次 advance 最多推进的步数，防止卡顿后一次补算过多
+        :param on_step: 每推进一步后调用 on_step(engine)，例如 TraceWriter.record
+        """
+        self.engine = engine
+        self.step = step
+        self.max_steps_per_advance = max_steps_per_advance
+        self.on_step = on_step
+
+        self.accumulator = 0.0  # 尚未推进的仿真时间 (s)
+        self.dropped_time = 0.0  # 因超过单次步数上限而丢弃的仿真时间 (s)
+
+    def reset(self):
+        """清空累计时间"""
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def advance(self, elapsed: float, speed: float = 1.0) -> int:
+        """
+        按实际经过的时间推进引擎
+        :param elapsed: 距上次调用的实际时间 (s)
+        :param speed: 仿真倍速
+        :return: 本次推进的步数
+        """
+        self.accumulator += elapsed * speed
+        steps = 0
+        while self.accumulator >= self.step:
+            if steps >= self.max_steps_per_advance:
+                # 跟不上时丢弃剩余时间，而不是让下一帧补算更多
+                dropped = self.accumulator - self.accumulator % self.step
+                self.dropped_time += dropped
+                self.accumulator -= dropped
+                break
+            self.engine.step(self.step)
+            if self.on_step is not None:
+                self.on_step(self.engine)
+            self.accumulator -= self.step
+            steps += 1
+        return steps
+
+    def run_steps(self, count: int) -> int:
+        """
+        不按实际时间，直接推进 count 步（最大速度模式），不影响累计时间
+        :param count: 步数
+        :return: 推进的步数
+        """
+        for _ in range(count):
+            self.engine.step(self.step)
+            if self.on_step is not None:
+                self.on_step(self.engine)
+        return count
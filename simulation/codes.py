@@ -0,0 +1,12 @@
+"""
+ZPW-2000 低频信号（码）定义。
+"""
+
+# 低频信号（Hz）
+LOW_FREQ_L = 11.4  # L  绿灯
+LOW_FREQ_LU = 13.6  # LU 绿黄
+LOW_FREQ_U = 16.9  # U  黄灯
+LOW_FREQ_H = 29.0  # H  红灯
+
+# 占用区段后方第 1、2、3、4 段依次发送的码
+CODE_SEQUENCE = (LOW_FREQ_H, LOW_FREQ_U, LOW_FREQ_LU, LOW_FREQ_L)
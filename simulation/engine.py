@@ -0,0 +1,420 @@
+"""
+无界面的仿真引擎：列车运行、尾部计算、低频信号与速度控制。
+
+界面层（QtGui/main_window.py 中的 mainUi）只通过 snapshot() 读取状态，不再直接参与计算。
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from simulation.codes import LOW_FREQ_L, LOW_FREQ_LU, LOW_FREQ_U, LOW_FREQ_H
+from simulation.intervals import TrainIntervals
+from simulation.layout import TrackLayout, default_layout, occupancy_mask
+from simulation.trains import TrainTable
+
+# 低频信号对应的速度限制 (km/h)，None 表示无限速
+SPEED_LIMITS = {
+    LOW_FREQ_L: None,  # 无限速
+    LOW_FREQ_LU: 160,  # 限速 160 km/h
+    LOW_FREQ_U: 80,  # 限速 80 km/h
+    LOW_FREQ_H: 0,  # 紧急停车
+}
+
+# 低频信号对应的减速度 (m/s^2)
+DECELERATIONS = {
+    LOW_FREQ_L: 0.5,  # 无限速时的减速度
+    LOW_FREQ_LU: 0.8,  # 限速 160 km/h 时的减速度
+    LOW_FREQ_U: 1.2,  # 限速 80 km/h 时的减速度
+    LOW_FREQ_H: 2.5,  # 紧急停车的减速度
+}
+
+# 统一的加速度 (m/s^2)
+ACCELERATION = 1.28
+
+# 物理时间步长 (秒)，运行与速度控制都按此固定步长推进，与界面刷新频率和倍速无关
+FIXED_STEP = 0.1
+
+# 按低频信号查表用的数组：信号值升序排列，限速已换算为 m/s，无限速为 inf
+_CODE_TABLE = np.array(sorted(SPEED_LIMITS))
+_LIMIT_TABLE = np.array([np.inf if SPEED_LIMITS[c] is None else SPEED_LIMITS[c] / 3.6 for c in _CODE_TABLE])
+_DECELERATION_TABLE = np.array([DECELERATIONS[c] for c in _CODE_TABLE])
+
+# 各编组对应的列车长度 (m)，顺序与 train*_nounBox 一致
+TRAIN_LENGTHS = (209, 302, 414, 440)
+
+
+class TrainSnapshot(NamedTuple):
+    """单列车状态的只读副本"""
+    current_track: int  # 0 表示已驶出线路
+    remaining_distance: float
+    remaining_time: float
+    speed: float
+    initial_speed: float
+    target_speed: float
+    tail_track: int
+    tail_distance: float
+
+
+class EngineSnapshot(NamedTuple):
+    """引擎状态的只读副本，供界面显示使用；数组字段均不可写"""
+    time: float
+    trains: TrainTable
+    occupied: np.ndarray  # 各区段占用状态（下标 0 对应 1G）
+    occupancy_mask: int  # 占用位掩码，第 i 位对应 occupied[i]
+    signals: np.ndarray  # 各区段低频信号（下标 0 对应 1G）
+    signal_version: int  # 低频信号重新计算的次数，不变时界面无需刷新轨道和信号显示
+
+    def train(self, index: int) -> TrainSnapshot:
+        """取出第 index 列车的状态"""
+        t = self.trains
+        return TrainSnapshot(
+            int(t.current_track[index]), float(t.remaining_distance[index]), float(t.remaining_time[index]),
+            float(t.speed[index]), float(t.initial_speed[index]), float(t.target_speed[index]),
+            int(t.tail_track[index]), float(t.tail_distance[index]),
+        )
+
+
+class EngineState(NamedTuple):
+    """
+    恢复引擎所需的最小状态，由 SimulationEngine.export_state 生成；
+    占用标志、低频信号和尾部位置都由列车表和掩码重新推出，不单独保存
+    """
+    time: float
+    trains: TrainTable  # 列车表的独立副本
+    occupancy_mask: int  # 占用位掩码
+    signal_mask: Optional[int]  # 已计算低频信号的占用掩码，尚未计算时为 None
+    signal_version: int
+    signal_skipped: int
+    first_step: bool
+
+
+class SimulationEngine:
+    def __init__(self, layout: TrackLayout = None):
+        """
+        :param layout: 线路布置，为 None 时使用与界面一致的默认线路
+        """
+        self.layout = layout if layout is not None else default_layout()
+        self.track_count = self.layout.section_count
+        # 设为 StageTimer 并打开时，step 按阶段计时（见 simulation/profiling.py）
+        self.stage_timer = None
+        # 时间、列车、占用与低频信号等运行状态在 reset 中初始化，新建的引擎与重置后的引擎完全相同
+        self.reset()
+
+    def add_train(self, track: int, position: float, speed_kmh: float, length: float = TRAIN_LENGTHS[0]):
+        """
+        添加一列车
+        :param track: 头部所在区段（1 起）
+        :param position: 头部在区段内已走过的距离 (m)
+        :param speed_kmh: 初始速度 (km/h)，同时作为无限速时的目标速度
+        :param length: 列车长度 (m)
+        :return: 新列车的编号
+        """
+        if not 1 <= track <= self.track_count:
+            raise ValueError(f"区段 {track} 不在线路上")
+        index = self.trains.append(track, self.layout.length_by_track[track] - position, speed_kmh / 3.6, length)
+        self.update_tail_positions()
+        return index
+
+    def reset(self):
+        """清空时间和列车，重新开始仿真"""
+        self.time = 0.0
+        self.trains = TrainTable()
+        # 列车区间索引，每次更新尾部位置时重建
+        self.update_tail_positions()
+
+        # 各区段占用标志与低频信号（下标 0 对应 1G），以及占用位掩码
+        self.occupied = np.zeros(self.track_count, dtype=bool)
+        self.occupancy_mask = 0
+        self.signals = np.full(self.track_count, LOW_FREQ_H)
+
+        # 头尾区段指纹：列车头尾都没有跨越区段边界时占用不变，不需要重新标记
+        self._extent_key = None
+        # 已计算低频信号的占用掩码：占用不变时低频信号及其派生显示都不需要重新计算
+        self._signal_mask = None
+        self.signal_version = 0  # 低频信号重新计算的次数
+        self.signal_skipped = 0  # 因占用未变化而跳过计算的次数
+
+        self._first_step = True  # 第一步把高于限速的初始速度直接设为限速
+
+    def step(self, dt: float = FIXED_STEP):
+        """
+        推进一个时间步
+        :param dt: 仿真时间步长 (s)，应保持固定以保证结果可复现
+        """
+        timer = self.stage_timer
+        if timer is not None and timer.enabled:
+            self._timed_step(dt, timer)
+            return
+        self.move_trains(dt)
+        self.update_tail_positions()
+        self.update_occupancy()
+        self.update_signals()
+        self.speed_control(dt)
+        self.time += dt
+
+    def _timed_step(self, dt: float, timer):
+        """与 step 相同，各阶段耗时计入 timer"""
+        timer.begin()
+        self.move_trains(dt)
+        timer.mark("engine.move_trains")
+        self.update_tail_positions()
+        timer.mark("engine.update_tail_positions")
+        self.update_occupancy()
+        timer.mark("engine.update_occupancy")
+        self.update_signals()
+        timer.mark("engine.update_signals")
+        self.speed_control(dt)
+        timer.mark("engine.speed_control")
+        self.time += dt
+
+    def run(self, until: float, dt: float = FIXED_STEP):
+        """
+        连续推进直到仿真时间达到 until
+        :param until: 结束时间 (s)
+        :param dt: 时间步长 (s)
+        """
+        # 留出半个步长的余量，避免浮点累加误差多走或少走一步
+        while self.time + dt * 0.5 < until:
+            self.step(dt)
+
+    def fast_forward(self, until: float, dt: float = FIXED_STEP, on_step=None) -> bool:
+        """
+        事件驱动推进到 until：状态不会变化的步直接按解析式跳过，
+        只在区段边界跨越和加减速阶段结束附近逐步推进。
+        占用与信号的变化序列与逐步调用 step(dt) 相同。
+        :param until: 结束时间 (s)
+        :param dt: 时间步长 (s)
+        :param on_step: 每个逐步推进的步之后调用 on_step(engine)，返回 True 时提前停止；
+                        跳过的步内占用和信号不变，不会调用
+        :return: 是否推进到了 until（被 on_step 提前停止时为 False）
+        """
+        ticks_left = int(round((until - self.time) / dt))
+        while ticks_left > 0:
+            # 留一步余量，事件所在的步始终由 step() 完成
+            skip = min(self.quiet_ticks(dt) - 1, ticks_left)
+            if skip >= 2:
+                self.skip_ticks(skip, dt)
+                ticks_left -= skip
+            else:
+                self.step(dt)
+                ticks_left -= 1
+                if on_step is not None and on_step(self):
+                    return False
+        return True
+
+    def _speed_rates(self):
+        """
+        当前信号下各列车每秒的速度变化量（加速为正，减速为负，已到目标速度为 0）
+        :return: 速度变化率数组 (m/s^2)
+        """
+        t = self.trains
+        deceleration = self.get_deceleration(self.head_signals())
+        return np.where(t.speed < t.target_speed, ACCELERATION, np.where(t.speed > t.target_speed, -deceleration, 0.0))
+
+    def quiet_ticks(self, dt: float = FIXED_STEP) -> float:
+        """
+        估计接下来至少多少步内没有事件（区段跨越、尾部跨越、加减速阶段结束），
+        估计偏保守，宁可少跳也不会越过事件。
+        :param dt: 时间步长 (s)
+        :return: 步数，没有列车在运动时为 inf
+        """
+        t = self.trains
+        if self._first_step:
+            return 0
+        if len(t) == 0:
+            return np.inf
+
+        rate = self._speed_rates()
+        gap = np.abs(t.target_speed - t.speed)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 速度到达目标值之前的步数
+            phase_ticks = np.where(rate != 0, np.floor(gap / (np.abs(rate) * dt)), np.inf)
+
+            # 窗口内速度不超过 max(当前速度, 目标速度)，以此估计最早的跨越时刻；已离开线路的列车不产生事件
+            top_speed = np.where(t.current_track > 0, np.maximum(t.speed, t.target_speed), 0.0)
+            head_ticks = np.where(
+                top_speed > 0, np.floor(np.maximum(self.exit_distances(), 0) / (top_speed * dt)), np.inf
+            )
+            # 尾部与头部不在同一区段时，尾部离开所在区段也是事件
+            tail_gap = t.tail_distance
+            tail_ticks = np.where(
+                (top_speed > 0) & self.intervals.spans, np.floor(tail_gap / (top_speed * dt)), np.inf
+            )
+
+        return float(min(phase_ticks.min(), head_ticks.min(), tail_ticks.min()))
+
+    def skip_ticks(self, ticks: int, dt: float = FIXED_STEP):
+        """
+        按解析式一次推进 ticks 步，调用方需保证这些步内没有事件（见 quiet_ticks）
+        :param ticks: 步数
+        :param dt: 时间步长 (s)
+        """
+        t = self.trains
+        delta_v = self._speed_rates() * dt  # 每步的速度变化量
+        # 每步先按当前速度运行再调整速度，运行距离为等差数列之和；已离开线路的列车不再运行
+        distance = dt * (ticks * t.speed + delta_v * ticks * (ticks - 1) / 2)
+        t.remaining_distance = t.remaining_distance - np.where(t.current_track > 0, distance, 0.0)
+
+        # 剩余时间按最后一步运行时的速度计算，与 move_trains 一致
+        last_speed = t.speed + delta_v * (ticks - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t.remaining_time = np.where(last_speed > 0, np.maximum(t.remaining_distance / last_speed, 0), 0.0)
+        t.speed = t.speed + delta_v * ticks
+
+        self.update_tail_positions()
+        self.signal_skipped += ticks  # 跳过的步内占用不变，也就不需要计算低频信号
+        self.time += ticks * dt
+
+    def exit_distances(self):
+        """
+        各列车离开所在区段还要走的距离 (m)：一般为头部到区段末端的剩余距离；
+        非环线的最后一个区段要等尾部也驶出线路，再加上列车长度
+        :return: 按列车排列的数组
+        """
+        t = self.trains
+        last = self.layout.next_track[t.current_track] == 0
+        return t.remaining_distance + np.where(last, t.length, 0.0)
+
+    def move_trains(self, dt: float):
+        """按当前速度推进所有列车，跨越区段时进入下一区段"""
+        t = self.trains
+        layout = self.layout
+        moving = (t.speed > 0) & (t.current_track > 0) & (self.exit_distances() > 0)
+        t.remaining_distance[moving] -= t.speed[moving] * dt
+
+        # 列车到达下一轨道时，将剩余距离累加到下一轨道的距离；环线终点之后回到 01G。
+        # 非环线头部驶出终点后剩余距离为负，仍占用最后一个区段，尾部也驶出后区段号为 0，列车离开线路
+        crossed = moving & (self.exit_distances() <= 0)
+        t.current_track[crossed] = layout.next_track[t.current_track[crossed]]
+        entered = crossed & (t.current_track > 0)
+        t.remaining_distance[entered] += layout.length_by_track[t.current_track[entered]]
+
+        t.remaining_time[moving] = np.maximum(t.remaining_distance[moving] / t.speed[moving], 0)
+        # 停车时保持当前位置，不回到区段起点
+        t.remaining_time[t.speed == 0] = 0
+
+    def update_tail_positions(self):
+        """重建列车区间索引，更新列车尾部的轨道编号和剩余距离"""
+        t = self.trains
+        self.intervals = TrainIntervals(self.layout, t.current_track, t.remaining_distance, t.length)
+        t.tail_track = self.intervals.tail_track
+        t.tail_distance = self.intervals.tail_distance
+
+    def update_occupancy(self):
+        """根据列车头部到尾部覆盖的区段更新占用标志，头尾所在区段不变时保持上一步的结果"""
+        key = self.intervals.extent_key()
+        if key == self._extent_key:
+            return
+        self._extent_key = key
+        self.occupied = self.intervals.occupied()
+        self.occupancy_mask = occupancy_mask(self.occupied)
+
+    def update_signals(self):
+        """占用掩码变化时才重新取低频信号，否则只计数"""
+        if self.occupancy_mask == self._signal_mask:
+            self.signal_skipped += 1
+            return
+        self._signal_mask = self.occupancy_mask
+        self.zpw_low_frequency_signal()
+        self.signal_version += 1
+
+    def zpw_low_frequency_signal(self):
+        """
+        根据占用情况取各区段低频信号（见 TrackLayout.low_frequency_signals），
+        按占用掩码缓存，重复出现的占用模式不再计算
+        """
+        self.signals = self.layout.signals_for_mask(self.occupancy_mask)
+
+    def head_signals(self):
+        """
+        各列车头部所在区段的低频信号，已离开线路的列车视为 L 码
+        :return: 按列车排列的数组
+        """
+        return np.concatenate(([LOW_FREQ_L], self.signals))[self.trains.current_track]
+
+    def separations(self):
+        """
+        各列车头部到前方最近列车尾部的距离 (m)；前方没有列车时为 inf
+        :return: 按列车排列的数组
+        """
+        return self.intervals.separations()
+
+    def get_target_speed(self, signals, initial_speed):
+        """
+        根据信号计算目标速度，参数为按列车排列的数组
+        :param signals: 各列车头部所在轨道的低频信号
+        :param initial_speed: 初始速度 (m/s)
+        :return: 目标速度 (m/s)
+        """
+        return np.minimum(_LIMIT_TABLE[np.searchsorted(_CODE_TABLE, signals)], initial_speed)
+
+    def get_deceleration(self, signals):
+        """
+        获取对应信号的减速度
+        :param signals: 各列车头部所在轨道的低频信号
+        :return: 对应的减速度 (m/s^2)
+        """
+        return _DECELERATION_TABLE[np.searchsorted(_CODE_TABLE, signals)]
+
+    def speed_control(self, time_step: float = FIXED_STEP):
+        """
+        根据列车头部的低频信号动态调整所有列车的速度
+        :param time_step: 时间步长 (s)，与本步的运行距离使用同一步长
+        """
+        t = self.trains
+        signals = self.head_signals()  # 获取各列车头部信号
+        target_speed = self.get_target_speed(signals, t.initial_speed)
+        deceleration = self.get_deceleration(signals)
+        t.target_speed = target_speed
+
+        speed = t.speed
+        speed = np.where(
+            speed > target_speed,
+            np.maximum(speed - deceleration * time_step, target_speed),  # 减速
+            np.minimum(speed + ACCELERATION * time_step, target_speed),  # 加速（已到目标速度时不变）
+        )
+        if self._first_step:
+            # 如果初始速度高于限速值，直接设置为限速
+            snap = (t.speed > target_speed) & (t.speed == t.initial_speed)
+            speed[snap] = target_speed[snap]
+        t.speed = speed
+
+        self._first_step = False
+
+    def export_state(self) -> EngineState:
+        """返回可以用 restore_state 恢复的状态副本，之后的推进不影响该副本"""
+        return EngineState(self.time, self.trains.copy(), self.occupancy_mask, self._signal_mask,
+                           self.signal_version, self.signal_skipped, self._first_step)
+
+    def restore_state(self, state: EngineState):
+        """
+        恢复到 export_state 导出的状态，之后逐步推进的结果与导出时继续推进完全相同
+        :param state: EngineState，可以多次恢复同一个状态
+        """
+        layout = self.layout
+        self.time = state.time
+        self.trains = state.trains.copy()
+        self.update_tail_positions()
+        self.occupancy_mask = state.occupancy_mask
+        self.occupied = layout.occupied_from_mask(state.occupancy_mask)
+        # 头尾区段指纹只用于跳过重复计算，清空后下一步重新标记占用，结果相同
+        self._extent_key = None
+        self._signal_mask = state.signal_mask
+        if state.signal_mask is None:
+            self.signals = np.full(self.track_count, LOW_FREQ_H)
+        else:
+            self.signals = layout.signals_for_mask(state.signal_mask)
+        self.signal_version = state.signal_version
+        self.signal_skipped = state.signal_skipped
+        self._first_step = state.first_step
+
+    def snapshot(self) -> EngineSnapshot:
+        """返回当前状态的只读副本"""
+        trains = self.trains.copy()
+        for name in TrainTable.FIELDS:
+            getattr(trains, name).flags.writeable = False
+        occupied = self.occupied.copy()
+        signals = self.signals.copy()
+        occupied.flags.writeable = False
+        signals.flags.writeable = False
+        return EngineSnapshot(self.time, trains, occupied, self.occupancy_mask, signals, self.signal_version)
@@ -0,0 +1,186 @@
+"""
+列车区间索引：每列车在线路上占据区间 [尾部, 头部]，位置为沿运行方向到线路入口的距离 (m)。
+
+尾部所在区段由区段长度的前缀和（TrackLayout.order_bounds）二分查找得到，
+列车可以跨越任意多个区段，区段长度也可以各不相同：
+    - 区段占用：每列车覆盖从尾部区段到头部区段的连续一段，用差分数组一次标记，O(列车数 + 区段数)；
+    - 位置查询：某处是否被占用、前方最近的列车，按排序后的区间二分查找，每次 O(log 列车数)。
+环线上尾部可以落在上一圈（位置为负），查询时按线路全长折回。
+区段序号沿运行方向从 1 起，0 表示线路外（已离开线路的列车，或非环线上尾部尚未进入线路）。
+"""
+from functools import cached_property
+
+import numpy as np
+
+from simulation.layout import TrackLayout
+
+
+class TrainIntervals:
+    def __init__(self, layout: TrackLayout, current_track, remaining_distance, length):
+        """
+        :param layout: 线路布置
+        :param current_track: 各列车头部所在区段（1 起，0 表示已离开线路）
+        :param remaining_distance: 各列车头部到区段末端的剩余距离 (m)
+        :param length: 各列车长度 (m)
+        """
+        self.layout = layout
+        bounds = layout.order_bounds
+        self._current_track = current_track
+        self.head_order = layout.order_by_track[current_track]
+        self._head_exit = bounds[self.head_order]  # 已离开线路的列车为 0，尾部随之落在线路外
+        self._remaining = remaining_distance
+        self._tail = tail = self._head_exit - (remaining_distance + length)
+
+        # 多数列车的尾部与头部在同一区段，只对其余列车二分查找；落在区段入口上的尾部属于该区段
+        self.tail_rank = self.head_order.copy()
+        self._laps = None  # 环线上尾部落后的圈数（0 或负数），都为 0 时为 None
+        outside = tail < bounds[self.head_order - 1]
+        if outside.any():
+            tail = tail.copy()
+            behind = tail[outside]
+            if layout.loop:
+                # 环线上尾部折回到 [0, 全长)
+                laps = np.floor(behind / layout.total_length)
+                behind -= laps * layout.total_length
+                self._laps = np.zeros(len(tail))
+                self._laps[outside] = laps
+            # 非环线尾部在线路入口之前时序号为 0
+            self.tail_rank[outside] = np.searchsorted(bounds[:-1], behind, side="right")
+            tail[outside] = behind
+
+        # 尾部所在区段号与尾部到该区段出口的距离；尾部在线路外时为 0 和到线路入口的距离
+        self.tail_track = layout.track_by_order[self.tail_rank]
+        self.tail_distance = bounds[self.tail_rank] - tail
+
+    def __len__(self):
+        return len(self.head_order)
+
+    @cached_property
+    def on_line(self):
+        """各列车是否仍在线路上"""
+        return self._current_track > 0
+
+    def extent_key(self) -> bytes:
+        """头尾所在区段的指纹，不变时占用也不变"""
+        return self.head_order.tobytes() + self.tail_rank.tobytes()
+
+    @cached_property
+    def tail_order(self):
+        """尾部区段序号按圈数展开（环线上可以小于 1），与 head_order 之差即跨越的区段数"""
+        if self._laps is None:
+            return self.tail_rank
+        return self.tail_rank + self._laps.astype(np.int64) * self.layout.section_count
+
+    @property
+    def spans(self):
+        """各列车尾部是否与头部不在同一区段"""
+        return self.tail_order != self.head_order
+
+    @cached_property
+    def head(self):
+        """各列车头部位置 (m)，已离开线路的列车为 nan"""
+        return np.where(self.on_line, self._head_exit - self._remaining, np.nan)
+
+    @cached_property
+    def tail(self):
+        """各列车尾部位置 (m)，环线上落在上一圈时为负，已离开线路的列车为 nan"""
+        return np.where(self.on_line, self._tail, np.nan)
+
+    def occupied(self):
+        """
+        各区段是否被列车占用
+        :return: 按区段排列的布尔数组（下标 0 对应 1G）
+        """
+        layout = self.layout
+        count = layout.section_count
+        first, last = self.tail_order, self.head_order
+
+        if layout.loop:
+            # 占满一整圈的列车覆盖全线；尾部在上一圈的列车拆成两段
+            if np.any(last - first >= count - 1):
+                return np.ones(count, dtype=bool)
+            wrap = first < 1
+            if wrap.any():
+                first = np.concatenate((np.where(wrap, first + count, first), np.ones(wrap.sum(), dtype=np.int64)))
+                last = np.concatenate((np.where(wrap, count, last), last[wrap]))
+        else:
+            # 已离开线路的列车首尾序号为 1 和 0，差分相互抵消
+            first = np.maximum(first, 1)
+
+        # 差分数组：区间起点 +1，终点之后 -1，前缀和大于 0 即被占用
+        cover = np.cumsum(np.bincount(first, minlength=count + 2) - np.bincount(last + 1, minlength=count + 2))
+        occupied = np.empty(count, dtype=bool)
+        occupied[layout.track_by_order[1:] - 1] = cover[1:count + 1] > 0
+        return occupied
+
+    @cached_property
+    def _by_tail(self):
+        """
+        按尾部排序的区间及头部的前缀最大值，供 occupied_at 查询；环线上跨越线路入口的区间拆成两段
+        :return: (尾部, 头部前缀最大值)
+        """
+        lo = self.tail[self.on_line]
+        hi = self.head[self.on_line]
+        if self.layout.loop:
+            total = self.layout.total_length
+            wrap = lo < 0
+            lo = np.concatenate((np.where(wrap, 0.0, lo), np.maximum(lo[wrap] + total, 0.0)))
+            hi = np.concatenate((hi, np.full(wrap.sum(), total)))
+        order = np.argsort(lo, kind="stable")
+        return lo[order], np.maximum.accumulate(hi[order]) if len(order) else hi
+
+    @cached_property
+    def _by_head(self):
+        """按头部排序的线路上列车编号及其头部位置，供 train_ahead 查询"""
+        index = np.flatnonzero(self.on_line)
+        index = index[np.argsort(self.head[index], kind="stable")]
+        return index, self.head[index]
+
+    def occupied_at(self, position):
+        """
+        线路上某处是否有列车
+        :param position: 沿运行方向到线路入口的距离 (m)，可以是数组
+        :return: 布尔值或布尔数组
+        """
+        lo, hi_max = self._by_tail
+        position = np.asarray(position, dtype=np.float64)
+        if self.layout.loop:
+            position = np.mod(position, self.layout.total_length)
+        if not len(lo):
+            return np.zeros(position.shape, dtype=bool)
+        k = np.searchsorted(lo, position, side="right")
+        return (k > 0) & (hi_max[np.maximum(k - 1, 0)] >= position)
+
+    def train_ahead(self, position):
+        """
+        位置前方最近的列车（头部在该位置前方），环线上越过线路入口继续查找
+        :param position: 沿运行方向到线路入口的距离 (m)，可以是数组
+        :return: (列车编号, 到该列车尾部的距离)；前方没有列车时为 -1 和 inf
+        """
+        index, heads = self._by_head
+        position = np.asarray(position, dtype=np.float64)
+        if not len(index):
+            return np.full(position.shape, -1), np.full(position.shape, np.inf)
+        k = np.searchsorted(heads, position, side="right")
+        beyond = k == len(index)
+        leader = index[np.where(beyond, 0, k)]
+        gap = self.tail[leader] - position
+        if self.layout.loop:
+            gap = np.where(beyond, gap + self.layout.total_length, gap)
+        else:
+            leader = np.where(beyond, -1, leader)
+            gap = np.where(beyond, np.inf, gap)
+        return leader, gap
+
+    def separations(self):
+        """
+        各列车头部到前方最近列车尾部的距离 (m)；前方没有其它列车时为 inf
+        :return: 按列车排列的数组
+        """
+        gaps = np.full(len(self), np.inf)
+        on_line = np.flatnonzero(self.on_line)
+        if len(on_line) < 2:
+            return gaps
+        leader, gap = self.train_ahead(self.head[on_line])
+        gaps[on_line] = np.where(leader == on_line, np.inf, gap)
+        return gaps
@@ -0,0 +1,217 @@
+"""
+线路布置：区段数量、长度、载频和运行方向，可从 JSON 文件加载。
+
+加载时一次性预计算区段的前后连接关系和“占用区段 → 受影响区段及其码”的传播表，
+引擎运行时只做查表，区段数量不影响代码。
+
+占用状态用整数位掩码表示（第 i 位对应第 i + 1 个区段），各区段的码是掩码的纯函数，
+按掩码缓存在有限大小的 LRU 缓存中，重复出现的占用模式只需一次查字典。
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from simulation.codes import CODE_SEQUENCE, LOW_FREQ_L
+
+# 默认载频 (Hz)，按区段顺序循环使用
+DEFAULT_CARRIERS = (2301.4, 1698.2, 2298.7, 1701.4)
+
+# 运行方向：forward 表示列车从 1G 驶向 NG，reverse 相反
+DIRECTIONS = {"forward": 1, "reverse": -1}
+
+# 每条线路缓存的占用模式数量
+SIGNAL_CACHE_SIZE = 1024
+
+
+def occupancy_mask(occupied) -> int:
+    """
+    把占用标志转换为整数位掩码
+    :param occupied: 按区段排列的布尔数组（下标 0 对应 1G）
+    :return: 第 i 位为 1 表示第 i + 1 个区段被占用
+    """
+    return int.from_bytes(np.packbits(occupied, bitorder="little").tobytes(), "little")
+
+
+class TrackLayout:
+    def __init__(self, lengths, carriers=None, names=None, direction: str = "forward", loop: bool = True,
+                 name: str = ""):
+        """
+        :param lengths: 各区段长度 (m)，顺序为 1G -> NG
+        :param carriers: 各区段载频 (Hz)，为 None 时循环使用 DEFAULT_CARRIERS
+        :param names: 各区段名称，为 None 时为 01G、02G……
+        :param direction: 运行方向，forward 或 reverse
+        :param loop: 线路是否首尾相连；不相连时列车尾部驶出终点后离开线路
+        :param name: 线路名称
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"未知的运行方向: {direction}")
+        self.name = name
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        if self.lengths.ndim != 1 or len(self.lengths) == 0:
+            raise ValueError("线路至少需要一个区段")
+        if np.any(self.lengths <= 0):
+            raise ValueError("区段长度必须大于 0")
+        count = len(self.lengths)
+
+        if carriers is None:
+            carriers = [DEFAULT_CARRIERS[i % len(DEFAULT_CARRIERS)] for i in range(count)]
+        self.carriers = np.asarray(carriers, dtype=np.float64)
+        if len(self.carriers) != count:
+            raise ValueError("载频数量与区段数量不一致")
+        self.names = list(names) if names is not None else [f"{i + 1:02d}G" for i in range(count)]
+        if len(self.names) != count:
+            raise ValueError("区段名称数量与区段数量不一致")
+        self.direction = direction
+        self.loop = loop
+
+        self._build_tables()
+        # 按占用掩码缓存各区段的码，每条线路一份
+        self.signals_for_mask = lru_cache(maxsize=SIGNAL_CACHE_SIZE)(self._signals_for_mask)
+
+    def __getstate__(self):
+        # 缓存不能序列化，传给其它进程时去掉，在对方进程中重新建立
+        state = self.__dict__.copy()
+        del state["signals_for_mask"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.signals_for_mask = lru_cache(maxsize=SIGNAL_CACHE_SIZE)(self._signals_for_mask)
+
+    @property
+    def section_count(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def entry_track(self) -> int:
+        """列车沿运行方向驶入线路的第一个区段号"""
+        return 1 if DIRECTIONS[self.direction] > 0 else self.section_count
+
+    def as_open_line(self) -> "TrackLayout":
+        """返回区段相同但首尾不相连的线路"""
+        if not self.loop:
+            return self
+        return TrackLayout(self.lengths, self.carriers, self.names, self.direction, loop=False, name=self.name)
+
+    def _build_tables(self):
+        """预计算区段连接关系和低频码传播表"""
+        count = self.section_count
+        step = DIRECTIONS[self.direction]
+        tracks = np.arange(1, count + 1)
+
+        # 以区段号（1 起）为下标的表，下标 0 与值 0 表示线路外
+        self.next_track = np.zeros(count + 1, dtype=np.int64)
+        self.prev_track = np.zeros(count + 1, dtype=np.int64)
+        following = tracks + step
+        preceding = tracks - step
+        if self.loop:
+            following = (following - 1) % count + 1
+            preceding = (preceding - 1) % count + 1
+        else:
+            following[(following < 1) | (following > count)] = 0
+            preceding[(preceding < 1) | (preceding > count)] = 0
+        self.next_track[1:] = following
+        self.prev_track[1:] = preceding
+
+        # 以区段号为下标的长度表，线路外的长度记为 inf
+        self.length_by_track = np.concatenate(([np.inf], self.lengths))
+
+        # 传播表：区段 i 占用时，其后方第 k 段（下标 i, k-1）收到 CODE_SEQUENCE[k-1]，-1 表示线路外
+        self.affected_index = np.full((count, len(CODE_SEQUENCE)), -1, dtype=np.int64)
+        behind = tracks.copy()
+        for k in range(len(CODE_SEQUENCE)):
+            behind = self.prev_track[behind]
+            self.affected_index[:, k] = behind - 1
+        self.affected_code = np.broadcast_to(np.array(CODE_SEQUENCE), self.affected_index.shape)
+
+        # 各区段起点到线路起点（1G 起点）的距离
+        self.section_starts = np.concatenate(([0.0], np.cumsum(self.lengths)[:-1]))
+        self.total_length = float(self.lengths.sum())
+
+        # 沿运行方向的区段序号（1 起）与区段号互查，下标与值 0 均表示线路外
+        self.track_by_order = np.concatenate(([0], tracks if step > 0 else tracks[::-1]))
+        self.order_by_track = np.zeros(count + 1, dtype=np.int64)
+        self.order_by_track[self.track_by_order[1:]] = tracks
+        # 沿运行方向的区段长度前缀和：序号 k 的区段从 order_bounds[k - 1] 延伸到 order_bounds[k]
+        self.order_bounds = np.concatenate(([0.0], np.cumsum(self.lengths[self.track_by_order[1:] - 1])))
+
+    def occupied_from_mask(self, mask: int) -> np.ndarray:
+        """
+        把占用掩码还原为按区段排列的布尔数组
+        :param mask: occupancy_mask() 的返回值
+        """
+        raw = np.frombuffer(mask.to_bytes((self.section_count + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:self.section_count].astype(bool)
+
+    def low_frequency_signals(self, occupied) -> np.ndarray:
+        """
+        根据占用情况计算各区段低频信号。
+        占用区段后方依次发送 H、U、LU、L 码，多个来源时取限制最严格（频率最高）者；
+        受影响的区段和码直接从预计算的传播表中取出。
+        :param occupied: 按区段排列的布尔数组（下标 0 对应 1G）
+        :return: 按区段排列的低频信号 (Hz)
+        """
+        signals = np.full(self.section_count, LOW_FREQ_L)
+        sources = np.flatnonzero(occupied)
+        index = self.affected_index[sources].ravel()
+        codes = self.affected_code[sources].ravel()
+        on_line = index >= 0
+        np.maximum.at(signals, index[on_line], codes[on_line])
+        return signals
+
+    def _signals_for_mask(self, mask: int) -> np.ndarray:
+        """按占用掩码计算各区段低频信号，结果只读，供 signals_for_mask 缓存"""
+        signals = self.low_frequency_signals(self.occupied_from_mask(mask))
+        signals.flags.writeable = False
+        return signals
+
+    def to_dict(self) -> dict:
+        """转换为可写入 JSON 的字典"""
+        return {
+            "name": self.name,
+            "direction": self.direction,
+            "loop": self.loop,
+            "sections": [
+                {"name": name, "length": float(length), "carrier": float(carrier)}
+                for name, length, carrier in zip(self.names, self.lengths, self.carriers)
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrackLayout":
+        """
+        从字典创建线路。sections 可以是逐段列表，也可以是 {"count", "length", "carriers"} 的简写
+        :param data: 线路描述
+        """
+        sections = data["sections"]
+        if isinstance(sections, dict):
+            count = int(sections["count"])
+            lengths = [float(sections.get("length", 1500))] * count
+            pattern = sections.get("carriers", DEFAULT_CARRIERS)
+            carriers = [pattern[i % len(pattern)] for i in range(count)]
+            names = None
+        else:
+            lengths = [float(s["length"]) for s in sections]
+            carriers = [s.get("carrier", DEFAULT_CARRIERS[i % len(DEFAULT_CARRIERS)]) for i, s in enumerate(sections)]
+            names = [s.get("name", f"{i + 1:02d}G") for i, s in enumerate(sections)]
+        return cls(
+            lengths, carriers, names,
+            direction=data.get("direction", "forward"),
+            loop=data.get("loop", True),
+            name=data.get("name", ""),
+        )
+
+
+def load_layout(path) -> TrackLayout:
+    """
+    从 JSON 文件加载线路
+    :param path: 文件路径
+    """
+    with open(path, encoding="utf-8") as f:
+        return TrackLayout.from_dict(json.load(f))
+
+
+def default_layout() -> TrackLayout:
+    """与界面一致的默认线路：8 段 1500 m 区段首尾相连"""
+    return TrackLayout([1500] * 8, name="默认线路")
@@ -0,0 +1,169 @@
+"""
+逐帧分阶段计时与帧耗时直方图。
+
+关闭时 begin_tick / mark / end_tick 立即返回，可以常驻在主循环中；
+打开后记录最近若干帧的各阶段耗时、帧耗时分位数、实际倍速和超时次数。
+引擎在工作线程中推进，其各阶段（运行、尾部、占用、信号、速度控制）由 StageTimer 在该线程中累计，
+每帧结束时并入 TickProfiler，按每步平均耗时统计。
+"""
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+
+class StageTimer:
+    """
+    在推进引擎的线程中累计各阶段耗时（SimulationEngine.stage_timer），只保存累计值；
+    另一个线程用 take() 整体取走，不需要加锁（取走瞬间写入的个别样本可能丢失）
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.totals = {}  # 阶段名 -> [累计耗时 (s), 次数]
+        self._last_mark = 0.0
+
+    def begin(self):
+        """一步开始"""
+        self._last_mark = time.perf_counter()
+
+    def mark(self, stage: str):
+        """
+        记录从上一个标记到现在的耗时，归入 stage
+        :param stage: 阶段名
+        """
+        now = time.perf_counter()
+        entry = self.totals.get(stage)
+        if entry is None:
+            entry = self.totals[stage] = [0.0, 0]
+        entry[0] += now - self._last_mark
+        entry[1] += 1
+        self._last_mark = now
+
+    def take(self) -> dict:
+        """取走并清空累计值：阶段名 -> [累计耗时 (s), 次数]"""
+        totals, self.totals = self.totals, {}
+        return totals
+
+
+class TickProfiler:
+    def __init__(self, window: int = 600, bin_width: float = 0.0005, bin_count: int = 200):
+        """
+        :param window: 滚动统计的帧数
+        :param bin_width: 直方图每格的宽度 (s)
+        :param bin_count: 直方图格数，超出范围的帧计入最后一格
+        """
+        self.enabled = False
+        self.window = window
+        self.bin_width = bin_width
+        self.histogram = np.zeros(bin_count, dtype=np.int64)
+        # 引擎各阶段的计时器，交给 SimulationEngine.stage_timer 后随本对象打开和关闭
+        self.engine_timer = StageTimer()
+        self.reset()
+
+    def reset(self):
+        """清空所有统计"""
+        self.latencies = deque(maxlen=self.window)  # 帧耗时 (s)
+        self.stages = {}  # 阶段名 -> 最近各帧耗时 (s)
+        self.engine_stages = {}  # 引擎阶段名 -> 最近各帧内每步的平均耗时 (s)
+        self.sim_advanced = deque(maxlen=self.window)  # 每帧推进的仿真时间 (s)
+        self.wall_elapsed = deque(maxlen=self.window)  # 每帧经过的实际时间 (s)
+        self.histogram[:] = 0
+        self.frames = 0
+        self.missed_deadlines = 0
+        self._tick_start = 0.0
+        self._last_mark = 0.0
+
+    def set_enabled(self, enabled: bool):
+        """打开或关闭计时，打开时清空旧数据"""
+        if enabled and not self.enabled:
+            self.reset()
+            self.engine_timer.take()
+        self.enabled = enabled
+        self.engine_timer.enabled = enabled
+
+    def begin_tick(self):
+        """一帧开始"""
+        if not self.enabled:
+            return
+        self._tick_start = self._last_mark = time.perf_counter()
+
+    def mark(self, stage: str):
+        """
+        记录从上一个标记到现在的耗时，归入 stage
+        :param stage: 阶段名
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        samples = self.stages.get(stage)
+        if samples is None:
+            samples = self.stages[stage] = deque(maxlen=self.window)
+        samples.append(now - self._last_mark)
+        self._last_mark = now
+
+    def end_tick(self, deadline: float, sim_advanced: float, wall_elapsed: float):
+        """
+        一帧结束
+        :param deadline: 本帧允许的最长耗时 (s)，通常为界面刷新间隔
+        :param sim_advanced: 本帧推进的仿真时间 (s)
+        :param wall_elapsed: 距上一帧经过的实际时间 (s)
+        """
+        if not self.enabled:
+            return
+        latency = time.perf_counter() - self._tick_start
+        self.latencies.append(latency)
+        self.sim_advanced.append(sim_advanced)
+        self.wall_elapsed.append(wall_elapsed)
+        self.histogram[min(int(latency / self.bin_width), len(self.histogram) - 1)] += 1
+        self.frames += 1
+        if latency > deadline:
+            self.missed_deadlines += 1
+        self._collect_engine_stages()
+
+    def _collect_engine_stages(self):
+        """并入工作线程在本帧内累计的引擎各阶段耗时"""
+        for stage, (total, count) in self.engine_timer.take().items():
+            samples = self.engine_stages.get(stage)
+            if samples is None:
+                samples = self.engine_stages[stage] = deque(maxlen=self.window)
+            samples.append(total / count)
+
+    def summary(self) -> dict:
+        """
+        滚动窗口内的统计
+        :return: p50 / p99 帧耗时 (ms)、实际倍速、超时次数、各阶段平均耗时和引擎各阶段每步平均耗时 (us)
+        """
+        if not self.latencies:
+            return {"frames": 0}
+        latencies = np.fromiter(self.latencies, dtype=np.float64)
+        wall = sum(self.wall_elapsed)
+        return {
+            "frames": self.frames,
+            "p50_ms": float(np.percentile(latencies, 50) * 1e3),
+            "p99_ms": float(np.percentile(latencies, 99) * 1e3),
+            "achieved_speed": sum(self.sim_advanced) / wall if wall > 0 else 0.0,
+            "missed_deadlines": self.missed_deadlines,
+            "stages_us": {name: float(np.mean(samples) * 1e6) for name, samples in self.stages.items() if samples},
+            "engine_stages_us": {
+                name: float(np.mean(samples) * 1e6) for name, samples in self.engine_stages.items() if samples
+            },
+        }
+
+    def export(self, path):
+        """
+        将直方图和最近各帧耗时导出为 JSON，供离线分析
+        :param path: 文件路径
+        """
+        data = {
+            "bin_width_s": self.bin_width,
+            "histogram": self.histogram.tolist(),
+            "frames": self.frames,
+            "missed_deadlines": self.missed_deadlines,
+            "recent_latencies_s": list(self.latencies),
+            "recent_stages_s": {name: list(samples) for name, samples in self.stages.items()},
+            "recent_engine_stages_s": {name: list(samples) for name, samples in self.engine_stages.items()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
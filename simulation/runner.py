@@ -0,0 +1,166 @@
+"""
+在后台线程中按实际时间推进仿真引擎。
+
+工作线程独占引擎，每推进一批步就发布一份只读快照（EngineSnapshot）；
+发布只是替换 latest 引用，界面线程按自己的帧率读取最新快照，无需加锁，
+界面刷新再慢也不会拖慢仿真时间。需要修改引擎的操作通过 submit 交给工作线程执行。
+
+最大速度模式（max_speed）下不再按实际时间推进，而是连续按固定步长推进，
+每推进 MAX_SPEED_BATCH 秒的实际时间发布一次快照，结果与按倍速推进相同。
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from simulation.clock import FixedStepClock
+from simulation.engine import FIXED_STEP
+
+
+class SimulationRunner:
+    # 工作线程两次检查之间的最长等待时间 (s)，决定暂停、退出等命令的响应速度
+    MAX_WAIT = 0.05
+    # 最短等待时间 (s)，高倍速下避免忙等
+    MIN_WAIT = 0.001
+    # 最大速度模式下每批推进的实际时间 (s)，每批之后发布快照并处理命令
+    MAX_SPEED_BATCH = 0.02
+    # 最大速度模式下两次检查时间之间推进的步数
+    MAX_SPEED_CHUNK = 32
+
+    def __init__(self, engine, step: float = FIXED_STEP, on_step=None, max_steps_per_advance: int = 200):
+        """
+        :param engine: 被推进的 SimulationEngine，线程运行期间只能由工作线程访问
+        :param step: 固定物理步长 (s)
+        :param on_step: 每推进一步后在工作线程中调用 on_step(engine)
+        :param max_steps_per_advance: 单次推进最多的步数，见 FixedStepClock
+        """
+        self.engine = engine
+        self.clock = FixedStepClock(engine, step, max_steps_per_advance, on_step)
+        self.speed = 1.0  # 仿真倍速，可在任意线程直接赋值
+        self.max_speed = False  # 最大速度模式，为 True 时忽略 speed，可在任意线程直接赋值
+        self.latest = engine.snapshot()  # 最近一次发布的快照
+        self.error = None  # 工作线程中发生的异常，发生后线程退出
+
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._paused = False
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """工作线程是否在运行（暂停时也为 True）"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def start(self, paused: bool = False):
+        """
+        启动工作线程，从当前引擎状态开始推进
+        :param paused: 为 True 时启动后处于暂停状态，调用 resume 后才开始推进
+        """
+        if self.running:
+            return
+        self.error = None
+        self._stopping = False
+        self._paused = paused
+        self.clock.reset()
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="SimulationRunner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止工作线程并等待其退出，之后调用方可以直接访问引擎"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._drain_commands()  # 线程退出前未执行的命令在这里补上
+
+    def pause(self):
+        """暂停推进，暂停期间的实际时间不计入仿真"""
+        self._paused = True
+        self._wake.set()
+
+    def resume(self):
+        """继续推进"""
+        self._paused = False
+        self._wake.set()
+
+    def submit(self, command) -> Future:
+        """
+        在工作线程中执行 command(engine) 并随后发布快照；线程未运行时立即在调用线程中执行
+        :param command: 接收引擎的可调用对象
+        :return: 完成后结果为 command 的返回值（例如 add_train 返回的列车编号）；
+                 command 抛出的异常只设置到返回的 Future 上，工作线程照常运行
+        """
+        future = Future()
+
+        def run(engine):
+            try:
+                future.set_result(command(engine))
+            except Exception as e:
+                future.set_exception(e)  # 异常只交给调用方，工作线程继续运行
+
+        if not self.running:
+            run(self.engine)
+            self.publish()
+            return future
+        self._commands.put(run)
+        self._wake.set()
+        return future
+
+    def publish(self):
+        """发布当前引擎状态的快照"""
+        self.latest = self.engine.snapshot()
+
+    def _drain_commands(self) -> bool:
+        """执行所有待处理的命令，返回是否执行过命令"""
+        executed = False
+        while True:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            command(self.engine)
+            executed = True
+        if executed:
+            self.publish()
+        return executed
+
+    def _run(self):
+        clock = time.perf_counter
+        last = clock()
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                self._drain_commands()
+                now = clock()
+                if self._paused:
+                    last = now
+                    self._wake.wait(self.MAX_WAIT)
+                    continue
+
+                if self.max_speed:
+                    # 连续推进一批步；退出该模式时从当前时刻重新按倍速计时，不补算
+                    deadline = now + self.MAX_SPEED_BATCH
+                    while not self._stopping and clock() < deadline:
+                        self.clock.run_steps(self.MAX_SPEED_CHUNK)
+                    self.publish()
+                    last = clock()
+                    continue
+
+                steps = self.clock.advance(now - last, self.speed)
+                last = now
+                if steps:
+                    self.publish()
+
+                # 等到下一步到期，或者有新命令
+                delay = (self.clock.step - self.clock.accumulator) / self.speed
+                self._wake.wait(min(max(delay, self.MIN_WAIT), self.MAX_WAIT))
+        except Exception as e:
+            self.error = e
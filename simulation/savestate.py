@@ -0,0 +1,141 @@
+"""
+仿真状态文件：保存引擎的完整状态（列车、占用与码、仿真时间）和倍速设置，之后从该状态继续运行。
+
+文件结构（小端，不使用 pickle）：
+    文件头   固定部分（_HEADER）+ 线路 JSON，按 8 字节对齐
+    掩码     占用掩码与已计算低频信号的占用掩码，各 (区段数 + 7) // 8 字节，按 8 字节对齐
+    列车表   TrainTable.FIELDS 各字段依次排列，每个字段 列车数 × 8 字节
+
+保存的是 SimulationEngine.export_state() 的内容，低频信号与尾部位置在恢复时重新推出，
+恢复后逐步推进的结果与保存时继续推进完全相同。恢复只是一次读文件和几次数组拷贝，
+从同一个预热好的状态分出多组实验时，加载一次后对各引擎调用 restore_state(saved.state) 即可。
+
+用法：
+    save_state("warm.zpwstate", engine.layout, engine.export_state())
+
+    saved = load_state("warm.zpwstate")
+    engine = saved.create_engine()
+"""
+import json
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+from simulation.engine import SimulationEngine, EngineState, FIXED_STEP
+from simulation.layout import TrackLayout
+from simulation.trace import align
+from simulation.trains import TrainTable
+
+STATE_MAGIC = b"ZPWSTATE"
+STATE_VERSION = 1
+
+# 固定文件头：魔数、版本、标志位、列车数、区段数、仿真时间、时间步长、倍速、信号版本、跳过计算次数、线路 JSON 长度
+_HEADER = struct.Struct("<8sHHIIdddQQI")
+
+# 标志位
+_FLAG_FIRST_STEP = 1  # 尚未推进第一步（初始速度高于限速时第一步直接降到限速）
+_FLAG_SIGNAL_MASK = 2  # 已计算过低频信号，文件中的信号掩码有效
+_FLAG_MAX_SPEED = 4  # 最大速度模式
+
+# 列车表各字段在文件中的类型，与 TrainTable.FIELDS 的顺序一致，保持全精度以便继续运行结果不变
+_FIELD_DTYPES = {name: np.dtype(dtype).newbyteorder("<") for name, dtype in TrainTable.FIELDS.items()}
+
+
+class SavedState(NamedTuple):
+    """状态文件的内容"""
+    layout: TrackLayout
+    state: EngineState
+    step: float  # 保存时使用的时间步长 (s)
+    speed: float  # 倍速
+    max_speed: bool  # 是否为最大速度模式
+
+    def create_engine(self) -> SimulationEngine:
+        """按文件中的线路创建引擎并恢复到保存的状态"""
+        engine = SimulationEngine(self.layout)
+        engine.restore_state(self.state)
+        return engine
+
+
+def save_state(path, layout: TrackLayout, state: EngineState, step: float = FIXED_STEP, speed: float = 1.0,
+               max_speed: bool = False):
+    """
+    把引擎状态写入状态文件
+    :param path: 输出文件路径
+    :param layout: 引擎使用的线路
+    :param state: SimulationEngine.export_state() 的返回值
+    :param step: 时间步长 (s)
+    :param speed: 倍速
+    :param max_speed: 是否为最大速度模式
+    """
+    trains = state.trains
+    train_count = len(trains)
+    section_count = layout.section_count
+    mask_size = (section_count + 7) // 8
+
+    flags = 0
+    if state.first_step:
+        flags |= _FLAG_FIRST_STEP
+    if state.signal_mask is not None:
+        flags |= _FLAG_SIGNAL_MASK
+    if max_speed:
+        flags |= _FLAG_MAX_SPEED
+
+    layout_json = json.dumps(layout.to_dict(), ensure_ascii=False).encode("utf-8")
+    header_size = align(_HEADER.size + len(layout_json))
+    masks = state.occupancy_mask.to_bytes(mask_size, "little") + (state.signal_mask or 0).to_bytes(mask_size, "little")
+
+    parts = [
+        _HEADER.pack(STATE_MAGIC, STATE_VERSION, flags, train_count, section_count, state.time, step, speed,
+                     state.signal_version, state.signal_skipped, len(layout_json)),
+        layout_json,
+        b"\0" * (header_size - _HEADER.size - len(layout_json)),
+        masks,
+        b"\0" * (align(len(masks)) - len(masks)),
+    ]
+    for name, dtype in _FIELD_DTYPES.items():
+        parts.append(np.ascontiguousarray(getattr(trains, name), dtype=dtype).tobytes())
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+
+
+def load_state(path) -> SavedState:
+    """
+    读取状态文件
+    :param path: save_state 写出的文件
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} 不是仿真状态文件")
+    (magic, version, flags, train_count, section_count, time, step, speed, signal_version, signal_skipped,
+     layout_size) = _HEADER.unpack_from(data)
+    if magic != STATE_MAGIC:
+        raise ValueError(f"{path} 不是仿真状态文件")
+    if version != STATE_VERSION:
+        raise ValueError(f"不支持的仿真状态版本: {version}")
+
+    offset = _HEADER.size
+    layout = TrackLayout.from_dict(json.loads(data[offset:offset + layout_size].decode("utf-8")))
+    if layout.section_count != section_count:
+        raise ValueError(f"线路区段数 {layout.section_count} 与文件头不一致")
+    offset = align(offset + layout_size)
+    mask_size = (section_count + 7) // 8
+    occupancy = int.from_bytes(data[offset:offset + mask_size], "little")
+    signal_mask = int.from_bytes(data[offset + mask_size:offset + 2 * mask_size], "little")
+    offset += align(2 * mask_size)
+
+    expected = offset + sum(dtype.itemsize for dtype in _FIELD_DTYPES.values()) * train_count
+    if len(data) != expected:
+        raise ValueError(f"{path} 长度 {len(data)} 与文件头不一致（应为 {expected}）")
+    trains = TrainTable()
+    for name, dtype in _FIELD_DTYPES.items():
+        column = np.frombuffer(data, dtype=dtype, count=train_count, offset=offset)
+        setattr(trains, name, column.astype(TrainTable.FIELDS[name]))
+        offset += dtype.itemsize * train_count
+
+    state = EngineState(
+        time, trains, occupancy, signal_mask if flags & _FLAG_SIGNAL_MASK else None,
+        signal_version, signal_skipped, bool(flags & _FLAG_FIRST_STEP),
+    )
+    return SavedState(layout, state, step, speed, bool(flags & _FLAG_MAX_SPEED))
@@ -0,0 +1,144 @@
+"""
+场景文件：线路、列车初始状态、仿真时长和步长，以及按场景运行无界面仿真。
+
+场景文件示例（scenarios/default.json，与界面默认输入一致）：
+    {
+        "layout": "../layouts/default.json",
+        "duration": 600,
+        "step": 0.1,
+        "trains": [
+            {"track": 1, "position": 1000, "speed": 300, "length": 209},
+            {"track": 3, "position": 1000, "speed": 300, "length": 209}
+        ]
+    }
+
+layout 可以是线路文件路径（相对于场景文件所在目录）、线路字典或 null（默认线路）。
+
+state 为仿真状态文件路径（见 simulation/savestate.py，相对于场景文件所在目录）时，
+线路、列车和时间步长都取自状态文件，不能再指定 layout 和 trains，step 须与保存时一致；
+duration 为从保存时刻起继续运行的时长：
+    {"state": "warm.zpwstate", "duration": 300}
+"""
+import json
+import os
+
+from simulation.engine import SimulationEngine, FIXED_STEP, TRAIN_LENGTHS
+from simulation.layout import TrackLayout, load_layout, default_layout
+from simulation.savestate import load_state
+from simulation.trace import TraceWriter
+
+# 场景字段的默认值
+DEFAULT_SCENARIO = {
+    "layout": None,
+    "duration": 600.0,  # 仿真时长 (s)
+    "step": FIXED_STEP,  # 时间步长 (s)
+    "trains": [],
+    "state": None,  # 仿真状态文件，从保存的状态继续运行
+}
+
+# 列车字段的默认值，与界面输入控件默认值一致；参数扫描的默认工况（simulation/sweep.py）也取自这里
+DEFAULT_TRAIN = {
+    "track": 1,  # 头部所在区段（1 起）
+    "position": 1000.0,  # 头部在区段内已走过的距离 (m)
+    "speed": 300.0,  # 初始速度 (km/h)
+    "length": float(TRAIN_LENGTHS[0]),  # 列车长度 (m)
+}
+
+
+def normalize_scenario(data: dict, base_dir: str = None) -> dict:
+    """
+    补齐默认值并检查字段
+    :param data: 场景字典
+    :param base_dir: 线路文件相对路径的基准目录
+    :return: 新的场景字典
+    """
+    unknown = set(data) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"未知的场景字段: {', '.join(sorted(unknown))}")
+    scenario = dict(DEFAULT_SCENARIO)
+    scenario.update(data)
+    for key in ("layout", "state"):
+        path = scenario[key]
+        if isinstance(path, str) and base_dir and not os.path.isabs(path):
+            scenario[key] = os.path.join(base_dir, path)
+    if scenario["state"] is not None and (scenario["layout"] is not None or scenario["trains"]):
+        raise ValueError("从状态文件继续运行时线路和列车取自状态文件，不能再指定 layout 和 trains")
+
+    trains = []
+    for spec in scenario["trains"]:
+        unknown = set(spec) - set(DEFAULT_TRAIN)
+        if unknown:
+            raise ValueError(f"未知的列车字段: {', '.join(sorted(unknown))}")
+        train = dict(DEFAULT_TRAIN)
+        train.update(spec)
+        trains.append(train)
+    scenario["trains"] = trains
+    scenario["duration"] = float(scenario["duration"])
+    scenario["step"] = float(scenario["step"])
+    if scenario["step"] <= 0:
+        raise ValueError("时间步长必须大于 0")
+    if scenario["state"] is not None:
+        # 按保存时的步长继续运行，结果才与不中断地运行相同
+        saved_step = load_state(scenario["state"]).step
+        if "step" in data and scenario["step"] != saved_step:
+            raise ValueError(f"时间步长 {scenario['step']} s 与状态文件的步长 {saved_step} s 不一致")
+        scenario["step"] = saved_step
+    return scenario
+
+
+def load_scenario(path) -> dict:
+    """
+    从 JSON 文件加载场景
+    :param path: 文件路径
+    """
+    with open(path, encoding="utf-8") as f:
+        return normalize_scenario(json.load(f), os.path.dirname(os.path.abspath(path)))
+
+
+def resolve_layout(layout) -> TrackLayout:
+    """
+    把场景中的 layout 字段转换为线路
+    :param layout: 线路文件路径、线路字典、TrackLayout 或 None
+    """
+    if layout is None:
+        return default_layout()
+    if isinstance(layout, TrackLayout):
+        return layout
+    if isinstance(layout, dict):
+        return TrackLayout.from_dict(layout)
+    return load_layout(layout)
+
+
+def build_engine(scenario: dict) -> SimulationEngine:
+    """
+    按场景创建并初始化引擎
+    :param scenario: normalize_scenario 处理过的场景
+    """
+    if scenario["state"] is not None:
+        return load_state(scenario["state"]).create_engine()
+    engine = SimulationEngine(resolve_layout(scenario["layout"]))
+    for train in scenario["trains"]:
+        engine.add_train(int(train["track"]), float(train["position"]), float(train["speed"]),
+                         float(train["length"]))
+    return engine
+
+
+def run_scenario(scenario: dict, out_path=None) -> SimulationEngine:
+    """
+    运行场景到结束时间（从状态文件继续时为保存时刻之后 duration 秒）
+    :param scenario: normalize_scenario 处理过的场景
+    :param out_path: 运行记录文件路径，为 None 时不记录
+    :return: 运行结束后的引擎
+    """
+    engine = build_engine(scenario)
+    dt = scenario["step"]
+    ticks = int(round(scenario["duration"] / dt))
+    if out_path is None:
+        engine.run(engine.time + ticks * dt, dt)
+        return engine
+
+    with TraceWriter(out_path, engine.layout, len(engine.trains), dt, lengths=engine.trains.length) as writer:
+        for _ in range(ticks):
+            engine.step(dt)
+            writer.record(engine)
+    return engine
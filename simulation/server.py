@@ -0,0 +1,318 @@
+"""
+本地控制与遥测服务：基于 asyncio 的 TCP 服务，协议为每行一个 JSON 对象。
+
+仿真在 SimulationRunner 的工作线程中运行，服务只读取其发布的快照并转发命令，
+任何客户端读得慢都只会丢弃发给它自己的旧状态，不会阻塞仿真。
+
+用法：
+    python -m simulation.server [--port 8765] [--layout layouts/default.json] [--rate 20]
+
+命令（客户端 -> 服务）：
+    {"cmd": "start", "trains": [{"track": 1, "position": 1000, "speed": 300, "length": 209}, ...]}
+                                          重新初始化并开始仿真；省略 trains 时从当前状态继续
+    {"cmd": "pause"} / {"cmd": "resume"}  暂停 / 继续
+    {"cmd": "speed", "value": 5}          设置倍速，"max" 为最大速度模式
+    {"cmd": "inject", "track": 5, "position": 0, "speed": 200, "length": 209}
+                                          在运行中加入一列车，应答中的 index 为新列车的编号
+    {"cmd": "subscribe", "rate": 10}      按每秒至多 rate 次接收状态推送，0 为取消订阅
+    {"cmd": "status"}                     查询运行状态和本连接丢弃的推送数
+
+每条命令都有一行应答：{"type": "reply", "cmd": ..., "ok": true, ...}，失败时带 "error"。
+状态推送：{"type": "state", "time", "occupied", "codes", "trains": [...]}。
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from simulation.engine import SimulationEngine
+from simulation.layout import load_layout, default_layout
+from simulation.runner import SimulationRunner
+
+
+class _Client:
+    """一个连接的发送队列、订阅频率和命令令牌桶"""
+
+    def __init__(self, writer, queue_size: int, command_rate: float):
+        self.writer = writer
+        self.task = asyncio.current_task()  # 处理该连接的任务
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.rate = 0.0  # 订阅频率 (Hz)，0 表示未订阅
+        self.last_sent = 0.0
+        self.last_snapshot = None  # 最近一次推送的快照
+        self.dropped = 0  # 因发送队列已满而丢弃的推送数
+        self.command_rate = command_rate
+        self.tokens = command_rate
+        self.token_time = time.monotonic()
+
+    def push(self, line: bytes):
+        """放入状态推送，队列已满时丢弃最旧的一条"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+    async def reply(self, message: dict):
+        """放入命令应答；应答不丢弃，队列已满时暂停读取该连接的命令"""
+        await self.queue.put(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def take_token(self) -> bool:
+        """令牌桶限流：每秒补充 command_rate 个令牌，桶容量同为 command_rate"""
+        now = time.monotonic()
+        self.tokens = min(self.command_rate, self.tokens + (now - self.token_time) * self.command_rate)
+        self.token_time = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def _finite(value, name: str) -> float:
+    """把命令参数转换为有限的浮点数，NaN 和无穷大会让仿真停止推进"""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name}必须是有限的数")
+    return value
+
+
+def encode_state(snapshot) -> bytes:
+    """把引擎快照编码为一行 JSON"""
+    t = snapshot.trains
+    trains = [
+        {
+            "track": int(t.current_track[i]),
+            "tail_track": int(t.tail_track[i]),
+            "remaining_distance": float(t.remaining_distance[i]),
+            "speed": float(t.speed[i]),
+            "target_speed": float(t.target_speed[i]),
+        }
+        for i in range(len(t))
+    ]
+    message = {
+        "type": "state",
+        "time": snapshot.time,
+        "occupied": snapshot.occupied.astype(int).tolist(),
+        "codes": snapshot.signals.tolist(),
+        "trains": trains,
+    }
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class ControlServer:
+    def __init__(self, runner: SimulationRunner, host: str = "127.0.0.1", port: int = 8765,
+                 max_rate: float = 20.0, queue_size: int = 16, command_rate: float = 50.0):
+        """
+        :param runner: 被控制的仿真线程
+        :param host: 监听地址，默认只接受本机连接
+        :param port: 监听端口，0 表示由系统分配
+        :param max_rate: 状态推送的最高频率 (Hz)，同时是检查新快照的频率
+        :param queue_size: 每个连接的发送队列长度，满时丢弃最旧的推送
+        :param command_rate: 每个连接每秒最多执行的命令数
+        """
+        self.runner = runner
+        self.host = host
+        self.port = port
+        self.max_rate = max_rate
+        self.queue_size = queue_size
+        self.command_rate = command_rate
+        self.clients = set()
+        self._server = None
+        self._broadcaster = None  # 状态推送任务，start 时创建
+
+    async def start(self):
+        """开始监听并启动状态推送任务"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._broadcaster = asyncio.create_task(self._broadcast())
+
+    async def serve_forever(self):
+        """持续服务直到任务被取消"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """停止监听并断开所有连接"""
+        if self._broadcaster is not None:
+            self._broadcaster.cancel()
+            self._broadcaster = None
+        if self._server is None:
+            return
+        self._server.close()
+        clients = list(self.clients)
+        for client in clients:
+            client.writer.close()
+        # 等各连接的处理任务读到连接关闭后自行退出
+        await asyncio.gather(*(client.task for client in clients), return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _broadcast(self):
+        """按 max_rate 检查新快照，每个快照只编码一次，按各连接的订阅频率推送"""
+        encoded, line = None, None
+        while True:
+            await asyncio.sleep(1 / self.max_rate)
+            snapshot = self.runner.latest
+            now = time.monotonic()
+            for client in self.clients:
+                if client.rate <= 0 or snapshot is client.last_snapshot or now - client.last_sent < 1 / client.rate:
+                    continue
+                if encoded is not snapshot:
+                    encoded, line = snapshot, encode_state(snapshot)
+                client.push(line)
+                client.last_sent = now
+                client.last_snapshot = snapshot
+
+    async def _send_loop(self, client: _Client):
+        """把发送队列中的数据写给客户端，客户端读得慢时只阻塞本连接"""
+        while True:
+            line = await client.queue.get()
+            client.writer.write(line)
+            await client.writer.drain()
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer, self.queue_size, self.command_rate)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    break
+                await client.reply(await self._execute(client, data))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _execute(self, client: _Client, data: bytes) -> dict:
+        """解析并执行一条命令，返回应答"""
+        try:
+            request = json.loads(data)
+            cmd = request["cmd"]
+        except (ValueError, KeyError, TypeError):
+            return {"type": "reply", "ok": False, "error": "无法解析的命令"}
+        reply = {"type": "reply", "cmd": cmd, "ok": True}
+        if not client.take_token():
+            reply.update(ok=False, error="命令过于频繁")
+            return reply
+        handler = getattr(self, f"_cmd_{cmd}", None)
+        if handler is None:
+            reply.update(ok=False, error=f"未知命令: {cmd}")
+            return reply
+        try:
+            result = handler(client, request)
+            if asyncio.iscoroutine(result):
+                result = await result
+            reply.update(result or {})
+        except (KeyError, TypeError, ValueError) as e:
+            reply.update(ok=False, error=str(e))
+        return reply
+
+    def _train_args(self, spec: dict) -> tuple:
+        """校验列车参数，返回 add_train 的参数"""
+        track = int(spec["track"])
+        if not 1 <= track <= self.runner.engine.track_count:
+            raise ValueError(f"区段 {track} 不在线路上")
+        position = _finite(spec.get("position", 0), "位置")
+        speed = _finite(spec.get("speed", 300), "速度")
+        length = _finite(spec.get("length", 209), "列车长度")
+        section_length = self.runner.engine.layout.length_by_track[track]
+        if not 0 <= position < section_length:
+            raise ValueError(f"位置必须在 0 到区段长度 {section_length:g} m 之间")
+        if speed < 0 or length <= 0:
+            raise ValueError("速度不能为负，列车长度必须大于 0")
+        return track, position, speed, length
+
+    async def _cmd_start(self, client, request):
+        trains = request.get("trains")
+        if trains is None:
+            if self.runner.running:
+                self.runner.resume()
+            else:
+                self.runner.start()
+            return None
+        args = [self._train_args(spec) for spec in trains]
+
+        def restart():
+            # 在线程池中等待工作线程退出，不阻塞事件循环
+            self.runner.stop()
+            engine = self.runner.engine
+            engine.reset()
+            for train in args:
+                engine.add_train(*train)
+            self.runner.start()
+
+        await asyncio.to_thread(restart)
+        return None
+
+    def _cmd_pause(self, client, request):
+        self.runner.pause()
+
+    def _cmd_resume(self, client, request):
+        self.runner.resume()
+
+    def _cmd_speed(self, client, request):
+        if request["value"] == "max":
+            self.runner.max_speed = True
+            return
+        speed = _finite(request["value"], "倍速")
+        if speed <= 0:
+            raise ValueError("倍速必须大于 0")
+        self.runner.speed = speed
+        self.runner.max_speed = False
+
+    async def _cmd_inject(self, client, request):
+        args = self._train_args(request)
+        # 编号由工作线程中的 add_train 分配，多条排队的命令各得到自己的编号
+        future = self.runner.submit(lambda engine: engine.add_train(*args))
+        return {"index": await asyncio.wrap_future(future)}
+
+    def _cmd_subscribe(self, client, request):
+        client.rate = min(max(_finite(request.get("rate", self.max_rate), "推送频率"), 0.0), self.max_rate)
+        return {"rate": client.rate}
+
+    def _cmd_status(self, client, request):
+        snapshot = self.runner.latest
+        return {
+            "time": snapshot.time,
+            "trains": len(snapshot.trains),
+            "running": self.runner.running,
+            "paused": self.runner.paused,
+            "speed": self.runner.speed,
+            "max_speed": self.runner.max_speed,
+            "dropped": client.dropped,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZPW-2000 仿真控制与遥测服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--layout", default=None, help="线路 JSON 文件，默认为界面使用的 8 段线路")
+    parser.add_argument("--rate", type=float, default=20.0, help="状态推送的最高频率 (Hz)")
+    args = parser.parse_args(argv)
+
+    layout = load_layout(args.layout) if args.layout else default_layout()
+    engine = SimulationEngine(layout)
+    runner = SimulationRunner(engine)
+    server = ControlServer(runner, args.host, args.port, max_rate=args.rate)
+
+    async def serve():
+        await server.start()
+        print(f"控制服务已启动: {server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+参数扫描：对参数网格中的每个点运行一次无界面仿真，在进程池中并行执行，
+并把每次运行的汇总指标逐行写入同一个结果文件。
+
+用法：
+    python -m simulation.sweep grid.json --out results.csv [--workers N]
+
+grid.json 示例：
+    {
+        "base": {"train1_track": 3, "duration": 600},
+        "grid": {
+            "train0_speed": [200, 250, 300, 350],
+            "train0_position": [0, 500, 1000],
+            "train0_length": [209, 302, 414, 440]
+        }
+    }
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulation.codes import LOW_FREQ_L, LOW_FREQ_H
+from simulation.engine import SimulationEngine, FIXED_STEP
+from simulation.scenario import normalize_scenario, build_engine, resolve_layout, DEFAULT_TRAIN
+
+# 与界面输入控件默认值一致的基准工况，列车参数取自场景的 DEFAULT_TRAIN
+DEFAULT_CASE = {
+    "layout": None,  # 线路文件路径或线路字典，None 为默认线路
+    "duration": 600.0,  # 仿真时长 (s)
+    "step": FIXED_STEP,  # 时间步长 (s)
+    "train_count": 2,
+    "train0_track": DEFAULT_TRAIN["track"],
+    "train0_position": DEFAULT_TRAIN["position"],
+    "train0_speed": DEFAULT_TRAIN["speed"],
+    "train0_length": DEFAULT_TRAIN["length"],
+    "train1_track": 3,  # 界面上第二列车默认在 3G
+    "train1_position": DEFAULT_TRAIN["position"],
+    "train1_speed": DEFAULT_TRAIN["speed"],
+    "train1_length": DEFAULT_TRAIN["length"],
+}
+
+# 结果文件的列
+RESULT_FIELDS = (
+    "case", "hit_h", "first_h_time", "time_to_stop", "min_separation",
+    "time_under_restriction", "time_in_h", "final_time",
+)
+
+
+def expand_grid(grid: dict, base: dict = None) -> list:
+    """
+    把参数网格展开为工况列表（笛卡尔积）
+    :param grid: 参数名 -> 取值列表
+    :param base: 所有工况共用的参数，覆盖 DEFAULT_CASE
+    :return: 完整工况字典的列表，参数顺序与 grid 一致
+    """
+    names = list(grid)
+    cases = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        case = dict(DEFAULT_CASE)
+        case.update(base or {})
+        case.update(zip(names, values))
+        cases.append(case)
+    return cases
+
+
+def case_to_scenario(case: dict) -> dict:
+    """
+    把扁平的工况字典转换为场景（见 simulation.scenario）
+    :param case: 工况字典，字段见 DEFAULT_CASE
+    """
+    trains = [
+        {
+            "track": int(case[f"train{i}_track"]),
+            "position": float(case[f"train{i}_position"]),
+            "speed": float(case[f"train{i}_speed"]),
+            "length": float(case[f"train{i}_length"]),
+        }
+        for i in range(int(case["train_count"]))
+    ]
+    return normalize_scenario({
+        "layout": case.get("layout"),
+        "duration": case["duration"],
+        "step": case["step"],
+        "trains": trains,
+    })
+
+
+def make_engine(case: dict) -> SimulationEngine:
+    """
+    按工况创建并初始化引擎
+    :param case: 工况字典，字段见 DEFAULT_CASE
+    """
+    return build_engine(case_to_scenario(case))
+
+
+def run_case(case: dict) -> dict:
+    """
+    运行一个工况并返回汇总指标
+    :param case: 工况字典
+    :return: 指标字典：
+        hit_h                  是否有列车头部收到 H 码（29 Hz）
+        first_h_time           第一次收到 H 码的时间 (s)
+        time_to_stop           第一次有列车停车的时间 (s)
+        min_separation         列车头部到前车尾部的最小距离 (m)
+        time_under_restriction 列车头部处于非 L 码下的累计时间（列车·秒）
+        time_in_h              列车头部处于 H 码下的累计时间（列车·秒）
+    """
+    engine = make_engine(case)
+    dt = float(case["step"])
+    ticks = int(round(float(case["duration"]) / dt))
+
+    first_h_time = None
+    time_to_stop = None
+    min_separation = np.inf
+    restricted_ticks = 0
+    h_ticks = 0
+    for _ in range(ticks):
+        engine.step(dt)
+        signals = engine.head_signals()
+        restricted_ticks += int(np.count_nonzero(signals != LOW_FREQ_L))
+        in_h = int(np.count_nonzero(signals == LOW_FREQ_H))
+        h_ticks += in_h
+        if in_h and first_h_time is None:
+            first_h_time = engine.time
+        if time_to_stop is None and np.any(engine.trains.speed == 0):
+            time_to_stop = engine.time
+        if len(engine.trains) > 1:
+            min_separation = min(min_separation, float(engine.separations().min()))
+
+    return {
+        "hit_h": first_h_time is not None,
+        "first_h_time": first_h_time,
+        "time_to_stop": time_to_stop,
+        "min_separation": None if np.isinf(min_separation) else min_separation,
+        "time_under_restriction": restricted_ticks * dt,
+        "time_in_h": h_ticks * dt,
+        "final_time": engine.time,
+    }
+
+
+def _layout_label(layout) -> str:
+    """
+    结果文件 layout 列的取值，用来区分不同线路的工况
+    :param layout: 工况的 layout 字段
+    :return: 线路文件路径；线路字典、TrackLayout 或 None 时为线路名称，没有名称时为线路的 JSON
+    """
+    if isinstance(layout, str):
+        return layout
+    layout = resolve_layout(layout)
+    return layout.name or json.dumps(layout.to_dict(), ensure_ascii=False)
+
+
+def _run_indexed(item):
+    index, case = item
+    return index, case, run_case(case)
+
+
+def run_sweep(cases: list, out_path, workers: int = None, param_names: list = None) -> int:
+    """
+    在进程池中运行所有工况，结果按工况顺序逐行写入 CSV 文件
+    :param cases: 工况列表，见 expand_grid
+    :param out_path: 结果文件路径
+    :param workers: 进程数，默认为 CPU 核数
+    :param param_names: 写入结果文件的参数列，默认为所有工况参数；layout 列写入 _layout_label 给出的线路路径或名称
+    :return: 完成的工况数
+    """
+    if param_names is None:
+        param_names = list(cases[0]) if cases else []
+    workers = workers or os.cpu_count() or 1
+    # 每个进程一次领取多个工况，减少进程间通信开销
+    chunksize = max(1, len(cases) // (workers * 8))
+
+    done = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(RESULT_FIELDS[:1]) + param_names + list(RESULT_FIELDS[1:]))
+        writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for index, case, result in executor.map(_run_indexed, enumerate(cases), chunksize=chunksize):
+                row = {"case": index}
+                row.update({name: case[name] for name in param_names})
+                if "layout" in row:
+                    row["layout"] = _layout_label(row["layout"])
+                row.update(result)
+                writer.writerow(row)
+                f.flush()  # 边算边写，中途中断也能保留已完成的结果
+                done += 1
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ZPW-2000 仿真参数扫描")
+    parser.add_argument("grid", help="参数网格 JSON 文件")
+    parser.add_argument("--out", required=True, help="结果 CSV 文件")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    args = parser.parse_args(argv)
+
+    with open(args.grid, encoding="utf-8") as f:
+        spec = json.load(f)
+    cases = expand_grid(spec["grid"], spec.get("base"))
+    done = run_sweep(cases, args.out, args.workers, param_names=list(spec["grid"]))
+    print(f"完成 {done} 个工况，结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+二进制运行记录（trace）：逐步记录列车状态和各区段低频信号，供回放与离线分析。
+
+文件结构：
+    文件头   固定部分（_HEADER）+ 线路 JSON，按 8 字节对齐，之后为各列车长度（float64，版本 2 起）
+    记录     每步一条，长度固定，由列车数和区段数决定（见 record_dtype）
+
+列车长度在一次运行中不变，只在文件头中保存一次；版本 1 的文件没有长度，读出为 0。
+记录长度固定，第 i 条记录位于 header_size + i * record_size，读取时按偏移直接定位，
+无需额外的索引文件。写入由后台线程完成，仿真线程只把整块缓冲区交出去；
+读取时对文件做内存映射，数小时的记录也不需要整体读入内存。
+
+用法：
+    with TraceWriter("run.zpwtrace", engine.layout, train_count=2, lengths=engine.trains.length) as writer:
+        for _ in range(ticks):
+            engine.step()
+            writer.record(engine)
+
+    with TraceReader("run.zpwtrace") as reader:
+        snapshot = reader.snapshot(reader.index_at_time(120.0))
+"""
+import json
+import mmap
+import queue
+import struct
+import threading
+
+import numpy as np
+
+from simulation.codes import CODE_SEQUENCE
+from simulation.engine import EngineSnapshot, FIXED_STEP
+from simulation.intervals import TrainIntervals
+from simulation.layout import TrackLayout, occupancy_mask
+from simulation.trains import TrainTable
+
+TRACE_MAGIC = b"ZPWTRACE"
+TRACE_VERSION = 2
+# 仍可读取的旧版本
+_READABLE_VERSIONS = (1, TRACE_VERSION)
+
+# 固定文件头：魔数、版本、列车数、区段数、记录长度、时间步长、记录数、线路 JSON 长度
+_HEADER = struct.Struct("<8sHIIIdQI")
+# 记录数字段在文件头中的偏移，关闭文件时回填
+_RECORD_COUNT_OFFSET = struct.calcsize("<8sHIIId")
+
+# 低频信号按升序编码为 0..3，与 engine._CODE_TABLE 顺序相同
+TRACE_CODES = np.array(sorted(CODE_SEQUENCE))
+
+
+def record_dtype(train_count: int, section_count: int) -> np.dtype:
+    """
+    一条记录的结构（紧凑排列，小端）
+    :param train_count: 列车数
+    :param section_count: 区段数
+    """
+    return np.dtype([
+        ("tick", "<u4"),  # 步序号，从 0 开始
+        ("time", "<f8"),  # 仿真时间 (s)
+        ("signal_version", "<u4"),  # 低频信号版本，回放时据此判断是否需要刷新轨道显示
+        ("current_track", "<i4", (train_count,)),  # 头部所在区段，0 表示已驶出线路
+        ("tail_track", "<i4", (train_count,)),  # 尾部所在区段
+        ("remaining_distance", "<f4", (train_count,)),  # 头部到区段末端的剩余距离 (m)
+        ("speed", "<f4", (train_count,)),  # 当前速度 (m/s)
+        ("target_speed", "<f4", (train_count,)),  # 当前目标速度 (m/s)
+        ("remaining_time", "<f4", (train_count,)),  # 到达下一区段的时间 (s)
+        ("occupied", "u1", (section_count,)),  # 各区段占用标志
+        ("codes", "u1", (section_count,)),  # 各区段低频信号在 TRACE_CODES 中的下标
+    ])
+
+
+def align(size: int, alignment: int = 8) -> int:
+    """把字节数向上取整到 alignment 的倍数，记录文件和状态文件中的各块都按 8 字节对齐"""
+    return (size + alignment - 1) // alignment * alignment
+
+
+class TraceWriter:
+    def __init__(self, path, layout: TrackLayout, train_count: int, dt: float = FIXED_STEP,
+                 buffer_records: int = 4096, max_pending: int = 8, lengths=None):
+        """
+        :param path: 输出文件路径
+        :param layout: 记录所用的线路，写入文件头供回放使用
+        :param train_count: 列车数，整个记录期间不变
+        :param dt: 时间步长 (s)
+        :param buffer_records: 每块缓冲区的记录数，写满后交给后台线程
+        :param max_pending: 等待写入的缓冲区块数上限，写盘跟不上时 record 会阻塞
+        :param lengths: 各列车长度 (m)，回放时用于绘制列车和计算尾部距离；为 None 时记为 0
+        """
+        self.train_count = train_count
+        self.section_count = layout.section_count
+        self.dt = dt
+        self.dtype = record_dtype(train_count, self.section_count)
+        self.record_count = 0
+
+        if lengths is None:
+            lengths = np.zeros(train_count)
+        lengths = np.asarray(lengths, dtype="<f8")
+        if len(lengths) != train_count:
+            raise ValueError(f"列车长度数 {len(lengths)} 与列车数 {train_count} 不一致")
+
+        layout_json = json.dumps(layout.to_dict(), ensure_ascii=False).encode("utf-8")
+        layout_end = align(_HEADER.size + len(layout_json))
+        self.header_size = layout_end + lengths.nbytes
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, train_count, self.section_count,
+                                      self.dtype.itemsize, dt, 0, len(layout_json)))
+        self._file.write(layout_json)
+        self._file.write(b"\0" * (layout_end - _HEADER.size - len(layout_json)))
+        self._file.write(lengths.tobytes())
+
+        self._buffer_records = buffer_records
+        self._buffer = np.zeros(buffer_records, dtype=self.dtype)
+        self._fill = 0
+        # 低频信号编码只在信号版本变化时重新计算
+        self._codes_version = None
+        self._codes = np.zeros(self.section_count, dtype=np.uint8)
+
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, name="TraceWriter", daemon=True)
+        self._thread.start()
+        self.closed = False
+
+    def _write_loop(self):
+        """后台线程：依次把缓冲区块写入文件，None 表示结束"""
+        while True:
+            block = self._pending.get()
+            if block is None:
+                return
+            if self._error is None:
+                try:
+                    self._file.write(block.data)
+                except OSError as e:
+                    self._error = e
+
+    def record(self, engine):
+        """
+        追加一条记录
+        :param engine: SimulationEngine，列车数须与 train_count 一致
+        """
+        if len(engine.trains) != self.train_count:
+            raise ValueError(f"列车数 {len(engine.trains)} 与记录的列车数 {self.train_count} 不一致")
+        if engine.signal_version != self._codes_version:
+            self._codes[:] = np.searchsorted(TRACE_CODES, engine.signals)
+            self._codes_version = engine.signal_version
+
+        t = engine.trains
+        row = self._buffer[self._fill]
+        row["tick"] = self.record_count
+        row["time"] = engine.time
+        row["signal_version"] = engine.signal_version
+        row["current_track"] = t.current_track
+        row["tail_track"] = t.tail_track
+        row["remaining_distance"] = t.remaining_distance
+        row["speed"] = t.speed
+        row["target_speed"] = t.target_speed
+        row["remaining_time"] = t.remaining_time
+        row["occupied"] = engine.occupied
+        row["codes"] = self._codes
+        self._fill += 1
+        self.record_count += 1
+        if self._fill == self._buffer_records:
+            self._flush_buffer()
+
+    def _flush_buffer(self):
+        """把已填写的缓冲区交给后台线程，并换一块新的缓冲区"""
+        if self._error is not None:
+            raise self._error
+        if self._fill:
+            self._pending.put(self._buffer[:self._fill])
+            self._buffer = np.zeros(self._buffer_records, dtype=self.dtype)
+            self._fill = 0
+
+    def close(self):
+        """写完剩余记录，回填文件头中的记录数并关闭文件"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._flush_buffer()
+        finally:
+            self._pending.put(None)
+            self._thread.join()
+            if self._error is None:
+                self._file.seek(_RECORD_COUNT_OFFSET)
+                self._file.write(struct.pack("<Q", self.record_count))
+            self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TraceReader:
+    def __init__(self, path):
+        """
+        :param path: TraceWriter 写出的文件
+        """
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} 不是运行记录文件")
+            (magic, version, self.train_count, self.section_count, record_size, self.dt,
+             record_count, layout_size) = _HEADER.unpack(header)
+            if magic != TRACE_MAGIC:
+                raise ValueError(f"{path} 不是运行记录文件")
+            if version not in _READABLE_VERSIONS:
+                raise ValueError(f"不支持的运行记录版本: {version}")
+            self.dtype = record_dtype(self.train_count, self.section_count)
+            if record_size != self.dtype.itemsize:
+                raise ValueError(f"记录长度 {record_size} 与文件头不一致")
+            self.layout = TrackLayout.from_dict(json.loads(self._file.read(layout_size).decode("utf-8")))
+            self.header_size = align(_HEADER.size + layout_size)
+            self.lengths = np.zeros(self.train_count)  # 各列车长度 (m)
+            if version >= 2:
+                self._file.seek(self.header_size)
+                self.lengths = np.frombuffer(self._file.read(8 * self.train_count), dtype="<f8").astype(np.float64)
+                self.header_size += self.lengths.nbytes
+
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        # 未正常关闭的记录文件头中记录数为 0，按文件长度计算完整记录的条数
+        available = (len(self._mmap) - self.header_size) // record_size
+        count = min(record_count, available) if record_count else available
+        # 映射到文件的只读结构数组，访问哪条记录才读取哪一页
+        self.records = np.frombuffer(self._mmap, dtype=self.dtype, count=count, offset=self.header_size)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def duration(self) -> float:
+        """记录覆盖的仿真时长 (s)"""
+        if not len(self.records):
+            return 0.0
+        return float(self.records[-1]["time"] - self.records[0]["time"])
+
+    def index_at_time(self, time: float) -> int:
+        """
+        仿真时间对应的记录下标，每条记录一步，直接按步长换算
+        :param time: 仿真时间 (s)
+        """
+        if not len(self.records):
+            raise IndexError("运行记录为空")
+        start = float(self.records[0]["time"])
+        index = int(round((time - start) / self.dt))
+        return min(max(index, 0), len(self.records) - 1)
+
+    def signals(self, index: int) -> np.ndarray:
+        """第 index 条记录的各区段低频信号 (Hz)"""
+        return TRACE_CODES[self.records[index]["codes"]]
+
+    def snapshot(self, index: int) -> EngineSnapshot:
+        """
+        把第 index 条记录还原为引擎快照，可直接交给界面的显示函数；
+        列车长度取自文件头，尾部距离由头部位置和长度重新计算，未记录的设定速度为 0
+        :param index: 记录下标
+        """
+        row = self.records[index]
+        trains = TrainTable()
+        for name, dtype in TrainTable.FIELDS.items():
+            if name in self.dtype.names:
+                column = row[name].astype(dtype)
+            else:
+                column = np.zeros(self.train_count, dtype=dtype)
+            setattr(trains, name, column)
+        trains.length = self.lengths.copy()
+        trains.tail_distance = TrainIntervals(
+            self.layout, trains.current_track, trains.remaining_distance, trains.length
+        ).tail_distance
+        for name in TrainTable.FIELDS:
+            getattr(trains, name).flags.writeable = False
+        occupied = row["occupied"].astype(bool)
+        signals = TRACE_CODES[row["codes"]]
+        occupied.flags.writeable = False
+        signals.flags.writeable = False
+        return EngineSnapshot(float(row["time"]), trains, occupied, occupancy_mask(occupied), signals,
+                              int(row["signal_version"]))
+
+    def close(self):
+        """释放内存映射并关闭文件"""
+        if self._mmap is None:
+            return
+        self.records = None  # 先释放对映射的引用，否则无法关闭
+        self._mmap.close()
+        self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
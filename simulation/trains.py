@@ -0,0 +1,60 @@
+"""
+列车表：以结构数组（struct-of-arrays）形式保存所有列车的状态。
+
+每个物理量是一个 NumPy 数组，下标即列车编号；运行、尾部计算和速度控制
+都是对整张表的一次向量化运算，列车数量不受限制。
+"""
+import numpy as np
+
+
+class TrainTable:
+    # 随列车数量增长的数组字段及其类型
+    FIELDS = {
+        "current_track": np.int64,  # 头部所在区段（1 起）
+        "remaining_distance": np.float64,  # 头部到区段末端的剩余距离 (m)
+        "speed": np.float64,  # 当前速度 (m/s)
+        "initial_speed": np.float64,  # 设定速度 (m/s)，无限速时的目标速度
+        "length": np.float64,  # 列车长度 (m)
+        "target_speed": np.float64,  # 当前目标速度 (m/s)
+        "remaining_time": np.float64,  # 到达下一区段的时间 (s)
+        "tail_track": np.int64,  # 尾部所在区段
+        "tail_distance": np.float64,  # 尾部到区段末端的距离 (m)
+    }
+
+    def __init__(self):
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self.speed)
+
+    def append(self, current_track, remaining_distance, speed, length):
+        """
+        在表尾追加一列车
+        :param current_track: 头部所在区段（1 起）
+        :param remaining_distance: 头部到区段末端的剩余距离 (m)
+        :param speed: 初始速度 (m/s)
+        :param length: 列车长度 (m)
+        :return: 新列车的编号
+        """
+        values = {
+            "current_track": current_track,
+            "remaining_distance": remaining_distance,
+            "speed": speed,
+            "initial_speed": speed,
+            "length": length,
+            "target_speed": 0.0,
+            "remaining_time": remaining_distance / speed if speed > 0 else 0,
+            "tail_track": 0,
+            "tail_distance": 0.0,
+        }
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.append(getattr(self, name), np.array([values[name]], dtype=dtype)))
+        return len(self) - 1
+
+    def copy(self):
+        """返回整张表的深拷贝"""
+        table = TrainTable()
+        for name in self.FIELDS:
+            setattr(table, name, getattr(self, name).copy())
+        return table
@@ -0,0 +1,27 @@
+"""SimulationEngine 的测试"""
+import numpy as np
+
+from simulation.engine import SimulationEngine
+
+
+def _first_step(engine):
+    engine.add_train(1, 1000, 300)
+    engine.add_train(5, 0, 300)
+    engine.step()
+    return engine.snapshot()
+
+
+def test_fresh_engine_matches_reset_engine():
+    """新建的引擎不调用 reset 也与重置后的引擎推进结果相同，包括第一步的限速"""
+    fresh = _first_step(SimulationEngine())
+    engine = SimulationEngine()
+    engine.add_train(3, 0, 100)
+    engine.run(10.0)
+    engine.reset()
+    reset = _first_step(engine)
+    assert fresh.time == reset.time
+    for name in fresh.trains.FIELDS:
+        np.testing.assert_array_equal(getattr(fresh.trains, name), getattr(reset.trains, name))
+    np.testing.assert_array_equal(fresh.occupied, reset.occupied)
+    np.testing.assert_array_equal(fresh.signals, reset.signals)
+    assert fresh.trains.speed[0] < 299 / 3.6
@@ -0,0 +1,28 @@
+"""SimulationRunner 工作线程的测试"""
+import time
+
+import pytest
+
+from simulation.engine import SimulationEngine
+from simulation.runner import SimulationRunner
+
+
+def test_failing_command_keeps_runner_running():
+    """命令抛出的异常只交给调用方，工作线程继续推进仿真"""
+    engine = SimulationEngine()
+    engine.add_train(1, 0, 300)
+    runner = SimulationRunner(engine)
+    runner.speed = 50.0
+    runner.start()
+    try:
+        future = runner.submit(lambda e: e.add_train(99, 0, 300))
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+        before = runner.latest.time
+        time.sleep(0.2)
+        assert runner.running
+        assert runner.error is None
+        assert runner.latest.time > before
+        assert runner.submit(lambda e: e.add_train(2, 0, 300)).result(timeout=5) == 1
+    finally:
+        runner.stop()
@@ -0,0 +1,53 @@
+"""ControlServer 命令校验的测试"""
+import asyncio
+import json
+
+import pytest
+
+from simulation.engine import SimulationEngine
+from simulation.runner import SimulationRunner
+from simulation.server import ControlServer
+
+
+async def _exchange(commands: list) -> list:
+    """启动服务并依次发送命令，返回各条应答"""
+    engine = SimulationEngine()
+    engine.add_train(1, 0, 300)
+    runner = SimulationRunner(engine)
+    runner.start()
+    server = ControlServer(runner, port=0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        replies = []
+        for command in commands:
+            writer.write(json.dumps(command).encode("utf-8") + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        return replies
+    finally:
+        await server.close()
+        runner.stop()
+
+
+@pytest.mark.parametrize("command", [
+    {"cmd": "speed", "value": "nan"},
+    {"cmd": "speed", "value": "inf"},
+    {"cmd": "subscribe", "rate": "nan"},
+    {"cmd": "inject", "track": 5, "speed": "nan"},
+    {"cmd": "inject", "track": 5, "length": "inf"},
+    {"cmd": "inject", "track": 5, "position": "nan"},
+    {"cmd": "inject", "track": 5, "position": -1},
+    {"cmd": "inject", "track": 5, "position": 1e6},
+])
+def test_invalid_values_are_rejected(command):
+    """非有限值和超出区段的位置返回错误应答，仿真照常推进"""
+    reply, status = asyncio.run(_exchange([command, {"cmd": "status"}]))
+    assert not reply["ok"] and reply["error"]
+    assert status["running"] and status["trains"] == 1
+
+
+def test_close_without_start():
+    """未启动的服务也可以关闭"""
+    asyncio.run(ControlServer(SimulationRunner(SimulationEngine())).close())